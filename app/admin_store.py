@@ -40,6 +40,18 @@ class AdminStore:
                 )
                 """
             )
+            conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO store_meta(key, value) VALUES ('revision', 0)")
+
+    @staticmethod
+    def _bump_revision(conn: sqlite3.Connection) -> None:
+        conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'revision'")
+
+    def revision(self) -> int:
+        """Counter bumped by every write, shared by all processes using the same database file."""
+        with self._conn() as conn:
+            row = conn.execute("SELECT value FROM store_meta WHERE key = 'revision'").fetchone()
+        return int(row["value"]) if row else 0
 
     def report_error(self, source: str, path: str, message: str) -> dict:
         now = utc_now()
@@ -51,18 +63,27 @@ class AdminStore:
                 """,
                 (source, path, message, now),
             )
+            self._bump_revision(conn)
             row = conn.execute("SELECT * FROM error_reports WHERE id = ?", (cur.lastrowid,)).fetchone()
         return dict(row)
 
-    def list_error_reports(self, include_resolved: bool = True) -> list[dict]:
+    def list_error_reports(self, include_resolved: bool = True, limit: int | None = None) -> list[dict]:
         q = "SELECT * FROM error_reports"
         if not include_resolved:
             q += " WHERE resolved_at IS NULL"
         q += " ORDER BY id DESC"
+        params: tuple = ()
+        if limit is not None:
+            q += " LIMIT ?"
+            params = (limit,)
         with self._conn() as conn:
-            rows = conn.execute(q).fetchall()
+            rows = conn.execute(q, params).fetchall()
         return [dict(r) for r in rows]
 
+    def count_error_reports(self) -> int:
+        with self._conn() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM error_reports").fetchone()[0])
+
     def resolve_error(self, report_id: int, resolved_by: str) -> bool:
         with self._conn() as conn:
             cur = conn.execute(
@@ -73,9 +94,13 @@ class AdminStore:
                 """,
                 (utc_now(), resolved_by, report_id),
             )
+            if cur.rowcount > 0:
+                self._bump_revision(conn)
         return cur.rowcount > 0
 
     def delete_error(self, report_id: int) -> bool:
         with self._conn() as conn:
             cur = conn.execute("DELETE FROM error_reports WHERE id = ?", (report_id,))
+            if cur.rowcount > 0:
+                self._bump_revision(conn)
         return cur.rowcount > 0
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from threading import Lock
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounds in-flight and queued work for one slow resource and sheds the excess.
+
+    Up to ``max_inflight`` callers run at once. Callers beyond that wait in a FIFO queue of at most
+    ``max_queue`` entries, and priority callers get their own queue that is always served first.
+    Callers that find their queue full, or that wait longer than ``max_wait_seconds``, are rejected
+    at once with a ``Retry-After`` estimate. They do not pile up in the thread pool. A released slot
+    is handed straight to the next waiter, so a newcomer cannot overtake the queue.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int,
+        max_queue: int,
+        max_priority_queue: int | None = None,
+        max_wait_seconds: float = 10.0,
+    ) -> None:
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)
+        self.max_priority_queue = self.max_queue if max_priority_queue is None else max(0, max_priority_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = Lock()
+        self._inflight = 0
+        self._queues: dict[bool, deque] = {True: deque(), False: deque()}
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.avg_wait_ms = 0.0
+        self.avg_service_ms = 0.0
+        self.version = 0
+
+    def _retry_after(self) -> int:
+        queued = len(self._queues[True]) + len(self._queues[False])
+        per_slot = max(self.avg_service_ms, 100.0) / 1000.0
+        return max(1, math.ceil(per_slot * (queued + 1) / self.max_inflight))
+
+    async def acquire(self, priority: bool = False) -> float:
+        """Wait for a slot and return the queue wait in milliseconds."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with self._lock:
+            ahead = len(self._queues[True]) + (0 if priority else len(self._queues[False]))
+            if self._inflight < self.max_inflight and ahead == 0:
+                self._inflight += 1
+                self._record_admission(0.0)
+                return 0.0
+            limit = self.max_priority_queue if priority else self.max_queue
+            if len(self._queues[priority]) >= limit:
+                self.rejected += 1
+                self.version += 1
+                raise AdmissionRejected("queue full", self._retry_after())
+            waiter = (loop, loop.create_future())
+            self._queues[priority].append(waiter)
+            self.version += 1
+
+        future = waiter[1]
+        try:
+            await asyncio.wait_for(future, timeout=self.max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            with self._lock:
+                queued = waiter in self._queues[priority]
+                if queued:
+                    self._queues[priority].remove(waiter)
+            if not queued and future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up; pass it on. If the hand-over is
+                # still pending, ``_hand_over`` sees the cancelled future and passes it on instead.
+                self.release()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            with self._lock:
+                self.timed_out += 1
+                self.version += 1
+                retry_after = self._retry_after()
+            raise AdmissionRejected("queue timeout", retry_after) from None
+
+        wait_ms = (loop.time() - started) * 1000.0
+        with self._lock:
+            self._record_admission(wait_ms)
+        return wait_ms
+
+    def _record_admission(self, wait_ms: float) -> None:
+        self.admitted += 1
+        self.version += 1
+        self.avg_wait_ms += (wait_ms - self.avg_wait_ms) * 0.1
+
+    def release(self, service_seconds: float | None = None) -> None:
+        with self._lock:
+            self.version += 1
+            if service_seconds is not None:
+                self.avg_service_ms += (service_seconds * 1000.0 - self.avg_service_ms) * 0.1
+            for priority in (True, False):
+                if self._queues[priority]:
+                    loop, future = self._queues[priority].popleft()
+                    break
+            else:
+                self._inflight = max(0, self._inflight - 1)
+                return
+        try:
+            loop.call_soon_threadsafe(self._hand_over, future)
+        except RuntimeError:
+            # The waiter's event loop is gone; give the slot to the next waiter instead.
+            self.release()
+
+    def _hand_over(self, future: asyncio.Future) -> None:
+        if future.done():
+            self.release()
+        else:
+            future.set_result(True)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "max_inflight": self.max_inflight,
+                "max_queue": self.max_queue,
+                "max_priority_queue": self.max_priority_queue,
+                "inflight": self._inflight,
+                "queued": len(self._queues[False]),
+                "priority_queued": len(self._queues[True]),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "avg_queue_wait_ms": round(self.avg_wait_ms, 2),
+                "avg_service_ms": round(self.avg_service_ms, 2),
+            }
@@ -0,0 +1,297 @@
+"""Offline bulk moderation over JSONL/CSV exports.
+
+Usage:
+    python -m app.bulk exports/*.jsonl --output results.jsonl --checkpoint bulk.ckpt.json
+
+Inputs are split into byte ranges that end on record boundaries. A process pool, which loads the
+term table once per worker, moderates the ranges. Results are appended in input order. After each
+range, the checkpoint stores the committed byte offset per input, the output size and the running
+statistics. If a crashed run is restarted with ``--resume``, it drops any partial output and
+continues from those offsets.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import sys
+from collections import deque
+from pathlib import Path
+from time import perf_counter
+
+CHECKPOINT_VERSION = 1
+
+
+def _input_format(path: Path) -> str:
+    return "csv" if path.suffix.lower() == ".csv" else "jsonl"
+
+
+def _empty_stats() -> dict:
+    return {"records": 0, "unsafe": 0, "errors": 0, "bytes": 0, "categories": {}}
+
+
+def _merge_stats(total: dict, part: dict) -> None:
+    for key in ("records", "unsafe", "errors", "bytes"):
+        total[key] += part[key]
+    for category, count in part["categories"].items():
+        total["categories"][category] = total["categories"].get(category, 0) + count
+
+
+def _read_range(path: str, start: int, end: int) -> bytes:
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[start:end]
+
+
+def _csv_header(path: Path) -> tuple[list[str], int]:
+    """Return the CSV header row and the byte offset of the first data record."""
+    with open(path, "rb") as fh:
+        raw = b""
+        while True:
+            line = fh.readline()
+            raw += line
+            if not line or raw.count(b'"') % 2 == 0:
+                break
+    rows = list(csv.reader(io.StringIO(raw.decode("utf-8", errors="replace"))))
+    return (rows[0] if rows else []), len(raw)
+
+
+def _chunk_ranges(path: Path, start: int, chunk_bytes: int, quoted: bool):
+    """Yield ``(start, end)`` byte ranges that never split a record.
+
+    For CSV a newline only ends a record when the number of quotes since the range start is even.
+    """
+    size = path.stat().st_size
+    if start >= size:
+        return
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        while start < size:
+            end = min(size, start + chunk_bytes)
+            quotes = mm[start:end].count(b'"') if quoted else 0
+            search = end - 1
+            while end < size:
+                newline = mm.find(b"\n", search)
+                if newline == -1:
+                    end = size
+                    break
+                if quoted:
+                    quotes += mm[end : newline + 1].count(b'"')
+                end = search = newline + 1
+                if quotes % 2 == 0:
+                    break
+            yield start, end
+            start = end
+
+
+def _init_worker() -> None:
+    # Under fork the table is inherited from the parent; under spawn this builds it once per worker.
+    import app.moderation  # noqa: F401
+
+
+def _record_texts(fmt: str, data: bytes, base: int, text_field: str, header: list[str] | None):
+    """Yield ``(offset, record, error)`` for every record in a byte range."""
+    if fmt == "jsonl":
+        offset = base
+        for line in data.splitlines(keepends=True):
+            record_offset = offset
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield record_offset, None, f"invalid json: {exc}"
+                continue
+            if not isinstance(record, dict):
+                yield record_offset, None, "record is not an object"
+                continue
+            yield record_offset, record, None
+        return
+
+    lines = data.splitlines(keepends=True)
+    # ``csv.reader`` pulls lines lazily, so a record starts at the first line pulled for it.
+    position = {"offset": base, "record": None}
+
+    def feed():
+        for line in lines:
+            if position["record"] is None:
+                position["record"] = position["offset"]
+            position["offset"] += len(line)
+            yield line.decode("utf-8", errors="replace")
+
+    reader = csv.reader(feed())
+    while True:
+        position["record"] = None
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield position["record"], None, f"invalid csv: {exc}"
+            continue
+        record_offset = position["record"]
+        if not row:
+            continue
+        yield record_offset, dict(zip(header or [], row)), None
+
+
+def _moderate_range(task: tuple) -> tuple[list[str], dict]:
+    from app.moderation import moderate_text
+
+    path, fmt, start, end, text_field, id_field, header, profile = task
+    data = _read_range(path, start, end)
+    stats = _empty_stats()
+    stats["bytes"] = len(data)
+    lines: list[str] = []
+
+    for offset, record, error in _record_texts(fmt, data, start, text_field, header):
+        out: dict = {"source": path, "offset": offset}
+        if record is not None and id_field:
+            out["id"] = record.get(id_field)
+        text = record.get(text_field) if record is not None else None
+        if error is None and not isinstance(text, str):
+            error = f"missing text field {text_field!r}"
+        if error is not None:
+            stats["errors"] += 1
+            out["error"] = error
+            lines.append(json.dumps(out, ensure_ascii=False))
+            continue
+
+        safe, category, matched_terms, _ = moderate_text(text, profile=profile)
+        stats["records"] += 1
+        stats["unsafe"] += 0 if safe else 1
+        stats["categories"][category] = stats["categories"].get(category, 0) + 1
+        out.update(safe=safe, category=category, matched_terms=matched_terms)
+        lines.append(json.dumps(out, ensure_ascii=False))
+
+    return lines, stats
+
+
+def _write_json_atomic(path: Path, payload: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _load_checkpoint(path: Path, inputs: list[Path]) -> dict:
+    checkpoint = json.loads(path.read_text(encoding="utf-8"))
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise SystemExit(f"Unsupported checkpoint version in {path}")
+    for source in inputs:
+        state = checkpoint["inputs"].get(str(source))
+        if state is not None and state["size"] != source.stat().st_size:
+            raise SystemExit(f"{source} changed size since the checkpoint was written")
+    return checkpoint
+
+
+def run(args: argparse.Namespace) -> dict:
+    inputs = [Path(p) for p in args.inputs]
+    output = Path(args.output)
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint else output.with_name(output.name + ".ckpt.json")
+    stats_path = Path(args.stats) if args.stats else output.with_name(output.name + ".stats.json")
+
+    if args.resume and checkpoint_path.exists():
+        checkpoint = _load_checkpoint(checkpoint_path, inputs)
+    else:
+        checkpoint = {"version": CHECKPOINT_VERSION, "inputs": {}, "output_bytes": 0, "stats": _empty_stats()}
+
+    # Anything written after the last checkpoint belongs to an unfinished range and is redone.
+    with open(output, "ab") as fh:
+        fh.truncate(checkpoint["output_bytes"])
+
+    def tasks():
+        for source in inputs:
+            fmt = _input_format(source)
+            state = checkpoint["inputs"].setdefault(
+                str(source), {"offset": 0, "size": source.stat().st_size, "done": False}
+            )
+            if state["done"]:
+                continue
+            header = None
+            if fmt == "csv":
+                header, data_start = _csv_header(source)
+                state["offset"] = max(state["offset"], data_start)
+            for start, end in _chunk_ranges(source, state["offset"], args.chunk_bytes, quoted=fmt == "csv"):
+                yield (str(source), fmt, start, end, args.text_field, args.id_field, header, args.profile)
+            yield (str(source), None, state["size"], state["size"], None, None, None, None)
+
+    started = perf_counter()
+    workers = max(1, args.workers)
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool, open(output, "ab") as out:
+        pending: deque = deque()
+        task_iter = tasks()
+
+        def submit() -> bool:
+            task = next(task_iter, None)
+            if task is None:
+                return False
+            if task[1] is None:
+                pending.append((task, None))
+            else:
+                pending.append((task, pool.apply_async(_moderate_range, (task,))))
+            return True
+
+        while len(pending) < workers * 4 and submit():
+            pass
+        while pending:
+            task, result = pending.popleft()
+            state = checkpoint["inputs"][task[0]]
+            if result is None:
+                state["done"] = True
+            else:
+                lines, part = result.get()
+                if lines:
+                    out.write(("\n".join(lines) + "\n").encode("utf-8"))
+                out.flush()
+                state["offset"] = task[3]
+                _merge_stats(checkpoint["stats"], part)
+            checkpoint["output_bytes"] = out.tell()
+            _write_json_atomic(checkpoint_path, checkpoint)
+            _write_json_atomic(stats_path, checkpoint["stats"])
+            if not args.quiet and result is not None:
+                elapsed = perf_counter() - started
+                print(
+                    f"[BULK] {task[0]} @ {task[3]}/{state['size']} bytes, "
+                    f"{checkpoint['stats']['records']} records, {elapsed:.1f}s",
+                    file=sys.stderr,
+                )
+            submit()
+
+    return checkpoint["stats"]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.bulk", description="Moderate JSONL/CSV exports offline.")
+    parser.add_argument("inputs", nargs="+", help="JSONL or CSV files (format chosen by extension)")
+    parser.add_argument("--output", required=True, help="JSONL file receiving one result per record")
+    parser.add_argument("--stats", help="per-category statistics JSON (default: <output>.stats.json)")
+    parser.add_argument("--checkpoint", help="checkpoint JSON (default: <output>.ckpt.json)")
+    parser.add_argument("--resume", action="store_true", help="continue from an existing checkpoint")
+    parser.add_argument("--text-field", default="text", help="field or column holding the text")
+    parser.add_argument("--id-field", default=None, help="field or column copied to each result")
+    parser.add_argument("--profile", default=None, help="moderation profile from moderation_profiles.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-bytes", type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--quiet", action="store_true")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    # Load the term table before the pool starts so forked workers share it copy-on-write.
+    from app.moderation import PROFILES
+
+    if args.profile is not None and args.profile not in PROFILES:
+        raise SystemExit(f"Unknown moderation profile: {args.profile}")
+
+    stats = run(args)
+    print(json.dumps(stats, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+"""Differential check of the rule engine against the original per-term implementation.
+
+Usage:
+    python -m app.differential --count 200 --seed 7
+
+Generates adversarial inputs from ``BASE_BAD_TERMS``, ``LEET_MAP``, ``BASE_PREFIXES`` and
+``BASE_SUFFIXES``, runs each through ``moderate_text`` and ``reference_moderate_text``, prints every
+input whose ``(safe, category, matched_terms)`` differ, and reports the speedup factor. Exits non-zero
+on any mismatch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+from time import perf_counter
+
+from app.moderation import (
+    BASE_BAD_TERMS,
+    BASE_PREFIXES,
+    BASE_SUFFIXES,
+    LEET_MAP,
+    moderate_text,
+    reference_moderate_text,
+)
+
+_FILLER = ["hello", "this", "is", "fine", "thanks", "see", "you", "later", "ok", "the", "game", "was", "long"]
+_SEPARATORS = [" ", "  ", "_", "-", ".", ", ", "!", "\n", "\t", " - ", "__", "/", "...", "'"]
+_GLUE = ["", "s", "ed", "er", "ing", "_", "2", "é", "ß", "'s"]
+
+
+def _leet(term: str, rng: random.Random) -> str:
+    return "".join(rng.choice(LEET_MAP[c]) if c in LEET_MAP and rng.random() < 0.5 else c for c in term)
+
+
+def _respace(term: str, rng: random.Random) -> str:
+    return rng.choice(_SEPARATORS).join(term.split(" "))
+
+
+def _case(text: str, rng: random.Random) -> str:
+    return rng.choice([str.lower, str.upper, str.title, lambda s: s])(text)
+
+
+def _mutate(term: str, rng: random.Random) -> str:
+    """One adversarial rendering of ``term``; many are deliberately near misses."""
+    kind = rng.randrange(9)
+    if kind == 0:
+        return term
+    if kind == 1:
+        return _leet(term, rng)
+    if kind == 2:
+        return _respace(term, rng)
+    if kind == 3:
+        # Glued affixes probe ``\b``: ``kill_`` and ``kill2`` are not whole words, ``kill's`` is.
+        return rng.choice(_GLUE) + term + rng.choice(_GLUE)
+    if kind == 4:
+        return f"{rng.choice(BASE_PREFIXES)}{rng.choice(_SEPARATORS)}{term}"
+    if kind == 5:
+        return f"{term}{rng.choice(_SEPARATORS)}{rng.choice(BASE_SUFFIXES)}"
+    if kind == 6:
+        return rng.choice(["-", "_", "."]).join(term.replace(" ", ""))
+    if kind == 7:
+        return term[: max(1, len(term) - 1)]
+    return _case(_leet(_respace(term, rng), rng), rng)
+
+
+def generate_corpus(count: int, seed: int = 0, max_terms: int = 4) -> list[str]:
+    rng = random.Random(seed)
+    categories = list(BASE_BAD_TERMS)
+    corpus: list[str] = []
+    for _ in range(count):
+        parts = rng.sample(_FILLER, rng.randint(0, 4))
+        # Terms from several categories in one text exercise category precedence.
+        for _ in range(rng.randint(0, max_terms)):
+            term = rng.choice(BASE_BAD_TERMS[rng.choice(categories)])
+            parts.insert(rng.randint(0, len(parts)), _mutate(term, rng))
+        joined = ""
+        for i, part in enumerate(parts):
+            joined += (rng.choice(_SEPARATORS) if i else "") + part
+        corpus.append(_case(joined, rng) if rng.random() < 0.2 else joined)
+    return corpus
+
+
+def compare(corpus: list[str]) -> tuple[list[dict], float, float]:
+    """Return ``(mismatches, optimized_seconds, reference_seconds)`` for ``corpus``."""
+    mismatches: list[dict] = []
+    optimized_seconds = reference_seconds = 0.0
+    for text in corpus:
+        start = perf_counter()
+        actual = moderate_text(text)[:3]
+        optimized_seconds += perf_counter() - start
+        start = perf_counter()
+        expected = reference_moderate_text(text)[:3]
+        reference_seconds += perf_counter() - start
+        if actual != expected:
+            mismatches.append({"text": text, "expected": expected, "actual": actual})
+    return mismatches, optimized_seconds, reference_seconds
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.differential", description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-terms", type=int, default=4, help="max bad-term renderings per input")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    corpus = generate_corpus(args.count, seed=args.seed, max_terms=args.max_terms)
+    mismatches, optimized, reference = compare(corpus)
+    for mismatch in mismatches:
+        print(json.dumps(mismatch, ensure_ascii=False))
+    speedup = reference / optimized if optimized else float("inf")
+    print(
+        f"[DIFF] {len(corpus)} inputs, {len(mismatches)} mismatches, "
+        f"moderate_text {optimized * 1000:.1f} ms, reference {reference * 1000:.1f} ms, speedup x{speedup:.0f}",
+        file=sys.stderr,
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
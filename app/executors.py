@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from threading import Lock
+from time import perf_counter
+
+import anyio
+import anyio.to_thread
+
+from app.request_timing import add_stage
+
+RULES = "rules"
+MODEL = "model"
+DATABASE = "database"
+
+
+class WorkloadExecutors:
+    """Separately sized thread limiters per workload class.
+
+    Sync handlers otherwise share anyio's single default limiter, so a burst of slow model calls
+    can take every worker thread and stall cheap rule checks and SQLite reads behind it.
+    """
+
+    def __init__(self, sizes: dict[str, int]) -> None:
+        self._limiters = {name: anyio.CapacityLimiter(max(1, size)) for name, size in sizes.items()}
+        self._lock = Lock()
+        self._stats = {name: {"completed": 0, "avg_wait_ms": 0.0, "avg_run_ms": 0.0} for name in sizes}
+        self.version = 0
+
+    async def run(self, workload: str, func, *args, **kwargs):
+        return await self._run(workload, func, args, kwargs, track=True)
+
+    async def run_untracked(self, workload: str, func, *args, **kwargs):
+        """Like ``run`` but left out of the statistics, for the metrics reads that report them.
+
+        Counting those would change ``version`` on every read and defeat the metrics ETag.
+        """
+        return await self._run(workload, func, args, kwargs, track=False)
+
+    async def _run(self, workload: str, func, args: tuple, kwargs: dict, track: bool):
+        limiter = self._limiters[workload]
+        queued_at = perf_counter()
+
+        def call():
+            started = perf_counter()
+            add_stage(f"{workload}_queue", (started - queued_at) * 1000.0)
+            if not track:
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._record(workload, (started - queued_at) * 1000.0, (perf_counter() - started) * 1000.0)
+
+        return await anyio.to_thread.run_sync(call, limiter=limiter)
+
+    def _record(self, workload: str, wait_ms: float, run_ms: float) -> None:
+        with self._lock:
+            stats = self._stats[workload]
+            stats["completed"] += 1
+            self.version += 1
+            stats["avg_wait_ms"] += (wait_ms - stats["avg_wait_ms"]) * 0.1
+            stats["avg_run_ms"] += (run_ms - stats["avg_run_ms"]) * 0.1
+
+    def snapshot(self) -> dict:
+        """Per-workload thread counts plus moving averages of queue wait and run time."""
+        out = {}
+        with self._lock:
+            for name, limiter in self._limiters.items():
+                stats = limiter.statistics()
+                out[name] = {
+                    "threads": stats.total_tokens,
+                    "busy": stats.borrowed_tokens,
+                    "waiting": stats.tasks_waiting,
+                    "completed": self._stats[name]["completed"],
+                    "avg_wait_ms": round(self._stats[name]["avg_wait_ms"], 2),
+                    "avg_run_ms": round(self._stats[name]["avg_run_ms"], 2),
+                }
+        return out
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import combinations
+
+MAX_DISTANCE = 2
+
+
+@dataclass(frozen=True)
+class FuzzyHit:
+    token: str
+    term: str
+    mask: int
+    distance: int
+
+
+def _deletes(word: str, distance: int) -> set[str]:
+    out = {word}
+    for count in range(1, min(distance, len(word) - 1) + 1):
+        for drop in combinations(range(len(word)), count):
+            out.add("".join(char for i, char in enumerate(word) if i not in drop))
+    return out
+
+
+def edit_distance(a: str, b: str, limit: int = MAX_DISTANCE) -> int:
+    """Optimal-string-alignment distance (adjacent transpositions count as one edit), capped at ``limit + 1``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return min(prev[-1], limit + 1)
+
+
+def _is_double_substitution(a: str, b: str) -> bool:
+    return len(a) == len(b) and sum(x != y for x, y in zip(a, b)) == 2
+
+
+class DeletionIndex:
+    """SymSpell-style index: every term is stored under all of its deletions up to ``MAX_DISTANCE``.
+
+    A token is looked up by generating its own deletions, so lookups cost a bounded number of dict
+    probes regardless of how many terms are indexed. Tokens longer than any term plus the edit budget
+    are rejected before generating deletions, which keeps a single huge token from costing ``O(n³)``.
+    A token that is an indexed term with a longer ending from ``endings`` (``murderers``, ``rapists``
+    from ``rape``) is reported at distance 0, since those are further than any edit budget.
+
+    To keep real words from matching as typos:
+
+    - short terms get a smaller edit budget, and the first letter must match (``modest`` vs ``molest``)
+    - a token that is another ending of a ``safe_words`` entry is skipped (``explorers`` from
+      ``explorer``)
+    - distance 2 may not be two substitutions, which mostly means a different word
+      (``exclusive`` vs ``explosive``)
+    """
+
+    def __init__(
+        self,
+        terms: dict[str, int],
+        ignore: set[str] | None = None,
+        safe_words: set[str] | None = None,
+        min_length_d1: int = 6,
+        min_length_d2: int = 9,
+        endings: list[str] | None = None,
+    ) -> None:
+        self.terms = dict(terms)
+        self.ignore = set(ignore or ())
+        self.safe_words = set(safe_words or ())
+        self.min_length_d1 = min_length_d1
+        self.min_length_d2 = min_length_d2
+        self.endings = sorted({"", *(endings or ())}, key=len, reverse=True)
+        self.max_term_length = max((len(term) for term in self.terms), default=0)
+        self.max_ending_length = len(self.endings[0])
+        self._deletes: dict[str, set[str]] = {}
+        for term in self.terms:
+            budget = self.budget(term)
+            if budget == 0:
+                continue
+            for variant in _deletes(term, budget):
+                self._deletes.setdefault(variant, set()).add(term)
+
+    def budget(self, term: str) -> int:
+        if len(term) >= self.min_length_d2:
+            return 2
+        if len(term) >= self.min_length_d1:
+            return 1
+        return 0
+
+    def _is_derived_form(self, token: str) -> bool:
+        """True when ``token`` is a safe word with its ending swapped, added or dropped.
+
+        The longest shared stem decides, so ``terrorists`` counts as ``terrorist`` + ``s`` rather
+        than a form of the safe word ``terrorism``.
+        """
+        for ending in reversed(self.endings):
+            if not token.endswith(ending) or len(token) - len(ending) < 3:
+                continue
+            stem = token[: len(token) - len(ending)]
+            for other in self.endings:
+                if other != ending and stem + other in self.safe_words:
+                    return True
+            if any(other != ending and stem + other in self.terms for other in self.endings):
+                return False
+        return False
+
+    def _inflected_terms(self, token: str) -> set[str]:
+        """Indexed terms that ``token`` extends by swapping their ending for a longer one."""
+        found: set[str] = set()
+        for ending in self.endings:
+            if not ending or not token.endswith(ending) or len(token) - len(ending) < 3:
+                continue
+            stem = token[: len(token) - len(ending)]
+            for other in self.endings:
+                if len(other) < len(ending) and stem + other in self.terms:
+                    found.add(stem + other)
+        return found
+
+    def lookup(self, token: str, max_distance: int = MAX_DISTANCE) -> list[FuzzyHit]:
+        max_distance = min(max_distance, MAX_DISTANCE)
+        if max_distance <= 0 or token in self.terms or token in self.ignore:
+            return []
+        if len(token) < self.min_length_d1 - 1:
+            return []
+        if len(token) > self.max_term_length + max(max_distance, self.max_ending_length):
+            return []
+        if self._is_derived_form(token):
+            return []
+
+        candidates: set[str] = set()
+        for variant in _deletes(token, max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        hits: list[FuzzyHit] = []
+        for term in candidates:
+            if term[0] != token[0]:
+                continue
+            limit = min(max_distance, self.budget(term))
+            distance = edit_distance(token, term, limit)
+            if distance == 2 and _is_double_substitution(token, term):
+                continue
+            if 0 < distance <= limit:
+                hits.append(FuzzyHit(token=token, term=term, mask=self.terms[term], distance=distance))
+        # ``terror`` is only reported for ``terrorists`` when the closer ``terrorist`` is not a hit.
+        for term in self._inflected_terms(token):
+            if not any(hit.term.startswith(term) for hit in hits):
+                hits.append(FuzzyHit(token=token, term=term, mask=self.terms[term], distance=0))
+        hits.sort(key=lambda hit: (hit.distance, hit.term))
+        return hits
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from contextlib import suppress
+from time import perf_counter
+
+import anyio.to_thread
+
+# Fields derived from the clock alone; dashboards compute them locally, so they never trigger a push.
+_CLOCK_FIELDS = {"now", "uptime_seconds", "steady_uptime_seconds"}
+
+logger = logging.getLogger(__name__)
+
+
+class HealthBroadcaster:
+    """Shares one metrics snapshot per interval with every Server-Sent Events subscriber.
+
+    The loop only runs while someone is subscribed. Each tick compares a cheap version string and
+    rebuilds the snapshot only when it changed; subscribers then receive just the changed keys.
+    """
+
+    def __init__(self, version, build, interval_seconds: float = 5.0, max_queue: int = 16, run=None) -> None:
+        self.interval_seconds = max(0.01, interval_seconds)
+        self.max_queue = max_queue
+        self._version_fn = version
+        self._build = build
+        # ``version`` and ``build`` may block (SQLite), so they run through ``run``; a worker thread by default.
+        self._run_blocking = run or anyio.to_thread.run_sync
+        self._version: str | None = None
+        self._latest: dict | None = None
+        self._latest_at = 0.0
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @staticmethod
+    def format_event(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+    async def _refresh(self) -> dict | None:
+        version = await self._run_blocking(self._version_fn)
+        if version == self._version and self._latest is not None:
+            return None
+        snapshot = await self._run_blocking(self._build)
+        previous = self._latest
+        self._version, self._latest, self._latest_at = version, snapshot, perf_counter()
+        if previous is None:
+            return snapshot
+        delta = {k: v for k, v in snapshot.items() if k not in _CLOCK_FIELDS and previous.get(k) != v}
+        if delta:
+            delta["now"] = snapshot["now"]
+        return delta or None
+
+    async def subscribe(self) -> tuple[asyncio.Queue, dict]:
+        if self._latest is None or perf_counter() - self._latest_at > self.interval_seconds:
+            delta = await self._refresh()
+            if delta and self._subscribers:
+                self._publish(self.format_event("delta", delta))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue, dict(self._latest or {})
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, event: str) -> None:
+        for queue in list(self._subscribers):
+            if queue.full():
+                # A stalled client gets one full snapshot instead of an unbounded backlog of deltas.
+                while not queue.empty():
+                    queue.get_nowait()
+                event_for_queue = self.format_event("snapshot", self._latest or {})
+            else:
+                event_for_queue = event
+            queue.put_nowait(event_for_queue)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                delta = await self._refresh()
+            except Exception:
+                # A transient failure such as a locked SQLite file must not stop pushes to connected
+                # dashboards; the next tick retries.
+                logger.exception("health broadcast refresh failed")
+                continue
+            if delta:
+                self._publish(self.format_event("delta", delta))
+
+    async def close(self) -> None:
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
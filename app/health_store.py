@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts run a single worker
+    fcntl = None
+
+
+def _parse(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+class HealthState:
+    """Probe counters shared by every worker through one SQLite file.
+
+    All workers read and write the same row, so ``/health/metrics`` reports the same aggregated view
+    whichever worker serves it. Only the worker holding the ``ProbeLeader`` lock records probes.
+    ``group`` identifies one server run: a leader from another group resets the counters when it
+    takes over, while a leader re-forked into the same group keeps them.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "safecomms_admin.db",
+        probe_interval_seconds: int = 300,
+        group: str | None = None,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.probe_interval_seconds = probe_interval_seconds
+        self.group = group or os.getenv("SAFECOMMS_HEALTH_GROUP") or str(os.getpid())
+        self._init_db()
+
+    @contextmanager
+    def _conn(self):
+        conn = sqlite3.connect(self.db_path, timeout=10.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS health_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    run_group TEXT NOT NULL,
+                    started_at TEXT NOT NULL,
+                    probe_leader_pid INTEGER,
+                    total_probes INTEGER NOT NULL DEFAULT 0,
+                    failed_probes INTEGER NOT NULL DEFAULT 0,
+                    last_probe_at TEXT,
+                    last_probe_success INTEGER,
+                    last_probe_error TEXT,
+                    last_response_ms REAL,
+                    last_failure_at TEXT,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO health_state(id, run_group, started_at) VALUES (1, ?, ?)",
+                (self.group, datetime.now(timezone.utc).isoformat()),
+            )
+
+    def claim_leadership(self) -> None:
+        """Mark this process as the probe runner, resetting the counters if it starts a new run."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._conn() as conn:
+            row = conn.execute("SELECT run_group FROM health_state WHERE id = 1").fetchone()
+            if row["run_group"] != self.group:
+                conn.execute(
+                    """
+                    UPDATE health_state
+                    SET run_group = ?, started_at = ?, total_probes = 0, failed_probes = 0,
+                        last_probe_at = NULL, last_probe_success = NULL, last_probe_error = NULL,
+                        last_response_ms = NULL, last_failure_at = NULL
+                    WHERE id = 1
+                    """,
+                    (self.group, now),
+                )
+            conn.execute(
+                "UPDATE health_state SET probe_leader_pid = ?, version = version + 1 WHERE id = 1", (os.getpid(),)
+            )
+
+    def record_probe(self, success: bool, response_ms: float, error: str | None = None) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        with self._conn() as conn:
+            conn.execute(
+                """
+                UPDATE health_state
+                SET last_probe_at = ?, last_probe_success = ?, last_response_ms = ?, last_probe_error = ?,
+                    total_probes = total_probes + 1,
+                    failed_probes = failed_probes + ?,
+                    last_failure_at = CASE WHEN ? THEN last_failure_at ELSE ? END,
+                    version = version + 1
+                WHERE id = 1
+                """,
+                (now, int(success), round(response_ms, 2), error, 0 if success else 1, int(success), now),
+            )
+
+    @property
+    def version(self) -> int:
+        with self._conn() as conn:
+            return int(conn.execute("SELECT version FROM health_state WHERE id = 1").fetchone()[0])
+
+    def snapshot(self) -> dict:
+        now = datetime.now(timezone.utc)
+        with self._conn() as conn:
+            row = dict(conn.execute("SELECT * FROM health_state WHERE id = 1").fetchone())
+
+        started_at = _parse(row["started_at"])
+        last_failure_at = _parse(row["last_failure_at"])
+        total_probes = row["total_probes"]
+        failed_probes = row["failed_probes"]
+        uptime_seconds = max(0.0, (now - started_at).total_seconds())
+        downtime_seconds = float(failed_probes * self.probe_interval_seconds)
+        if last_failure_at is None:
+            steady_uptime_seconds = uptime_seconds
+        else:
+            steady_uptime_seconds = max(0.0, (now - last_failure_at).total_seconds())
+
+        availability = 100.0
+        if total_probes > 0:
+            availability = (1.0 - (failed_probes / total_probes)) * 100.0
+
+        success = row["last_probe_success"]
+        return {
+            "started_at": row["started_at"],
+            "now": now.isoformat(),
+            "probe_interval_seconds": self.probe_interval_seconds,
+            "probe_leader_pid": row["probe_leader_pid"],
+            "uptime_seconds": round(uptime_seconds, 2),
+            "steady_uptime_seconds": round(steady_uptime_seconds, 2),
+            "downtime_seconds": round(downtime_seconds, 2),
+            "total_probes": total_probes,
+            "failed_probes": failed_probes,
+            "availability_percent": round(availability, 4),
+            "last_probe_at": row["last_probe_at"],
+            "last_probe_success": None if success is None else bool(success),
+            "last_probe_error": row["last_probe_error"],
+            "last_failure_at": row["last_failure_at"],
+            "last_response_ms": row["last_response_ms"],
+        }
+
+
+class ProbeLeader:
+    """Elects one probe runner per host with a non-blocking ``flock`` on ``lock_path``.
+
+    The lock is held for the life of the process; the OS drops it when the process exits, so the next
+    worker that calls ``try_acquire`` takes over.
+    """
+
+    def __init__(self, lock_path: str) -> None:
+        self.lock_path = lock_path
+        self._fd: int | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        if self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
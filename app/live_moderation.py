@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from app.models import TermSpan, TranscriptVerdict
+from app.moderation import TERM_MATCHER, get_profile
+from app.term_matcher import WORD, TermMatch, TermMatcher
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class TranscriptSession:
+    """Incremental moderation state for one live transcript.
+
+    Each fragment is scanned together with a fixed-size tail of the previous text, so multi-word and
+    obfuscated terms split across fragments are still found while the per-fragment cost does not
+    depend on how long the session has been running. Offsets are relative to the whole transcript.
+    """
+
+    def __init__(
+        self,
+        matcher: TermMatcher = TERM_MATCHER,
+        overlap: int | None = None,
+        profile: str | None = None,
+    ) -> None:
+        self.matcher = matcher
+        self.profile_mask = get_profile(profile).mask
+        self.overlap = overlap or 2 * matcher.max_term_length
+        self.length = 0
+        self.mask = 0
+        self.matched: dict[str, int] = {}
+        self._tail = ""
+        self._tail_start = 0
+        self._tail_cut_in_word = False
+        self._emitted: set[tuple[int, int, str]] = set()
+
+    def feed(self, fragment: str, final: bool = False) -> TranscriptVerdict:
+        window = self._tail + fragment.lower()
+        base = self._tail_start
+        fresh: list[TermMatch] = []
+
+        for match in self.matcher.scan(window):
+            hit = match.mask & self.profile_mask
+            if not hit:
+                continue
+            if match.kind == WORD:
+                if match.start == 0 and self._tail_cut_in_word:
+                    continue
+                if match.end == len(window) and not final:
+                    # The token may still continue in the next fragment; it stays in the tail.
+                    continue
+            key = (base + match.start, base + match.end, match.term)
+            if key in self._emitted:
+                continue
+            self._emitted.add(key)
+            fresh.append(TermMatch(match.term, key[0], key[1], hit, match.kind))
+            self.matched[match.term] = self.matched.get(match.term, 0) | hit
+            self.mask |= hit
+
+        self.length = base + len(window)
+        cut = max(0, len(window) - self.overlap)
+        if cut:
+            self._tail_cut_in_word = _is_word_char(window[cut - 1]) and _is_word_char(window[cut])
+            self._tail = window[cut:]
+            self._tail_start = base + cut
+            self._emitted = {key for key in self._emitted if key[0] >= self._tail_start}
+        else:
+            self._tail = window
+
+        return self._verdict(fresh)
+
+    def _verdict(self, fresh: list[TermMatch]) -> TranscriptVerdict:
+        new_matches = [
+            TermSpan(term=m.term, category=self.matcher.category_for(m.mask), start=m.start, end=m.end) for m in fresh
+        ]
+        if not self.mask:
+            return TranscriptVerdict(
+                safe=True,
+                category="clean",
+                matched_terms=[],
+                reason="No risky terms detected.",
+                offset=self.length,
+                new_matches=new_matches,
+            )
+        return TranscriptVerdict(
+            safe=False,
+            category=self.matcher.category_for(self.mask),
+            matched_terms=sorted(self.matched),
+            reason="Potentially unsafe content detected.",
+            offset=self.length,
+            new_matches=new_matches,
+        )
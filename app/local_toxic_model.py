@@ -2,56 +2,146 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from threading import Lock
 
 from app.models import CheckResponse
+from app.request_timing import stage
+from app.startup import STARTUP_TIMINGS
+
+TOXIC_LABELS = {"TOXIC", "LABEL_1", "1"}
+
+WINDOW_REDUCERS = {
+    "max": max,
+    "mean": lambda scores: sum(scores) / len(scores),
+}
 
 
 @dataclass
 class ToxicResult:
     label: str
     score: float
+    windows: int = 1
+    coverage: float = 1.0
 
 
 class LocalToxicModel:
-    def __init__(self, model_dir: str | None = None) -> None:
+    def __init__(
+        self,
+        model_dir: str | None = None,
+        max_windows: int | None = None,
+        window_overlap: int | None = None,
+        reducer: str | None = None,
+    ) -> None:
         self.model_dir = model_dir or os.getenv("LOCAL_TOXIC_MODEL_DIR", "models/martin-ha-toxic-comment-model")
+        self.max_windows = max(1, max_windows or int(os.getenv("LOCAL_TOXIC_MAX_WINDOWS", "16")))
+        if window_overlap is None:
+            window_overlap = int(os.getenv("LOCAL_TOXIC_WINDOW_OVERLAP", "64"))
+        self.window_overlap = max(0, window_overlap)
+        self.reducer = (reducer or os.getenv("LOCAL_TOXIC_WINDOW_REDUCER", "max")).lower()
+        if self.reducer not in WINDOW_REDUCERS:
+            raise ValueError(f"Unknown window reducer: {self.reducer}")
         self._pipeline = None
 
     def _load(self) -> None:
         if self._pipeline is not None:
             return
 
+        # transformers/torch are imported on first use so the rule-based paths never pay for them.
+        with STARTUP_TIMINGS.phase("local_model_import"):
+            try:
+                from transformers import AutoModelForSequenceClassification, AutoTokenizer, TextClassificationPipeline
+            except Exception as exc:
+                raise RuntimeError("Missing optional dependencies. Install requirements-ai.txt") from exc
+
+        with STARTUP_TIMINGS.phase("local_model_load"):
+            tokenizer = AutoTokenizer.from_pretrained(self.model_dir, local_files_only=True)
+            model = AutoModelForSequenceClassification.from_pretrained(self.model_dir, local_files_only=True)
+            self._pipeline = TextClassificationPipeline(model=model, tokenizer=tokenizer)
+
+    def _windows(self, text: str) -> tuple[list[str], float]:
+        """Split ``text`` into token windows; also return the fraction of tokens they cover."""
+        tokenizer = self._pipeline.tokenizer
+        max_len = min(int(getattr(tokenizer, "model_max_length", 512) or 512), 512)
+        size = max(1, max_len - tokenizer.num_special_tokens_to_add())
+
         try:
-            from transformers import AutoModelForSequenceClassification, AutoTokenizer, TextClassificationPipeline
-        except Exception as exc:
-            raise RuntimeError("Missing optional dependencies. Install requirements-ai.txt") from exc
+            encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, truncation=False)
+        except NotImplementedError:
+            # Slow tokenizers have no offset mapping; fall back to plain truncation.
+            return [text], 1.0
+        offsets = encoded["offset_mapping"]
+        total = len(offsets)
+        if total <= size:
+            return [text], 1.0
+
+        step = max(1, size - min(self.window_overlap, size - 1))
+        last_start = total - size
+        starts = list(range(0, last_start, step)) + [last_start]
+        if len(starts) > self.max_windows:
+            # Spread the capped windows evenly so the start and end of the text are always scored.
+            span = self.max_windows - 1
+            starts = [round(i * last_start / span) for i in range(self.max_windows)] if span else [0]
 
-        tokenizer = AutoTokenizer.from_pretrained(self.model_dir, local_files_only=True)
-        model = AutoModelForSequenceClassification.from_pretrained(self.model_dir, local_files_only=True)
-        self._pipeline = TextClassificationPipeline(model=model, tokenizer=tokenizer)
+        # Tokens between capped windows are never scored; callers see that as coverage below 1.
+        covered = sum(min(size, nxt - start) for start, nxt in zip(starts, starts[1:])) + min(size, total - starts[-1])
+        windows = [text[offsets[start][0] : offsets[min(start + size, total) - 1][1]] for start in starts]
+        return windows, covered / total
 
     def classify(self, text: str) -> ToxicResult:
         self._load()
-        result = self._pipeline(text, truncation=True)[0]
-        return ToxicResult(label=str(result.get("label", "")).upper(), score=float(result.get("score", 0.0)))
+        with stage("tokenize"):
+            windows, coverage = self._windows(text)
+        if len(windows) == 1:
+            with stage("inference"):
+                result = self._pipeline(text, truncation=True)[0]
+            return ToxicResult(label=str(result.get("label", "")).upper(), score=float(result.get("score", 0.0)))
+
+        with stage("inference"):
+            outputs = self._pipeline(windows, truncation=True, top_k=None, batch_size=len(windows))
+        toxic_scores = [
+            sum(float(item.get("score", 0.0)) for item in scores if str(item.get("label", "")).upper() in TOXIC_LABELS)
+            for scores in outputs
+        ]
+        score = WINDOW_REDUCERS[self.reducer](toxic_scores)
+        if score >= 0.5:
+            return ToxicResult(label="TOXIC", score=score, windows=len(windows), coverage=coverage)
+        return ToxicResult(label="NON-TOXIC", score=1.0 - score, windows=len(windows), coverage=coverage)
+
+
+_local_model: LocalToxicModel | None = None
+_local_model_lock = Lock()
+
+
+def get_local_model() -> LocalToxicModel:
+    global _local_model
+    with _local_model_lock:
+        if _local_model is None:
+            model = LocalToxicModel()
+            model._load()
+            _local_model = model
+        return _local_model
 
 
 def ai_check_to_response(text: str, threshold: float = 0.5) -> CheckResponse:
-    model = LocalToxicModel()
+    with stage("model_load"):
+        model = get_local_model()
     out = model.classify(text)
-    is_toxic = out.label in {"TOXIC", "LABEL_1", "1"} and out.score >= threshold
+    is_toxic = out.label in TOXIC_LABELS and out.score >= threshold
+    windows = f", windows={out.windows}" if out.windows > 1 else ""
+    if out.coverage < 1.0:
+        windows += f", scored {out.coverage:.0%} of tokens"
 
     if is_toxic:
         return CheckResponse(
             safe=False,
             category="toxicity_ai",
             matched_terms=[],
-            reason=f"Local AI toxic score={out.score:.3f} (label={out.label}, threshold={threshold:.2f})",
+            reason=f"Local AI toxic score={out.score:.3f} (label={out.label}, threshold={threshold:.2f}{windows})",
         )
 
     return CheckResponse(
         safe=True,
         category="clean",
         matched_terms=[],
-        reason=f"Local AI non-toxic score={out.score:.3f} (label={out.label}, threshold={threshold:.2f})",
+        reason=f"Local AI non-toxic score={out.score:.3f} (label={out.label}, threshold={threshold:.2f}{windows})",
     )
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -9,11 +11,41 @@ class AudioCheckRequest(BaseModel):
     transcript: str = Field(min_length=1, max_length=20000)
 
 
+class FuzzyMatch(BaseModel):
+    token: str
+    term: str
+    category: str
+    distance: int
+
+
+class TermSpan(BaseModel):
+    term: str
+    category: str
+    start: int
+    end: int
+
+
+class MatchSpan(TermSpan):
+    match_type: Literal["direct", "deobfuscated"]
+
+
 class CheckResponse(BaseModel):
     safe: bool
     category: str
     matched_terms: list[str]
     reason: str
+    fuzzy_matches: list[FuzzyMatch] | None = None
+    matches: list[MatchSpan] | None = None
+
+
+class TranscriptFragment(BaseModel):
+    text: str = Field(default="", max_length=20000)
+    final: bool = False
+
+
+class TranscriptVerdict(CheckResponse):
+    offset: int
+    new_matches: list[TermSpan]
 
 
 class ErrorReportRequest(BaseModel):
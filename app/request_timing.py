@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from time import perf_counter
+
+
+class RequestTimings:
+    """Per-request stage durations, reported as a ``Server-Timing`` header and in the slow log."""
+
+    def __init__(self) -> None:
+        self.started = perf_counter()
+        self.stages: dict[str, float] = {}
+        self.text: str | None = None
+        self.matched_count: int | None = None
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def note(self, text: str, matched_count: int) -> None:
+        self.text = text
+        self.matched_count = matched_count
+
+    def total_ms(self) -> float:
+        return (perf_counter() - self.started) * 1000.0
+
+    def header(self, total_ms: float) -> str:
+        parts = [f"{name};dur={ms:.2f}" for name, ms in self.stages.items()]
+        parts.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(parts)
+
+
+_CURRENT: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _CURRENT.set(timings)
+    return timings
+
+
+def current_timings() -> RequestTimings | None:
+    return _CURRENT.get()
+
+
+def add_stage(name: str, ms: float) -> None:
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.add(name, ms)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block into the current request; a no-op outside a timed request (bulk runs, probes)."""
+    timings = _CURRENT.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (perf_counter() - start) * 1000.0)
+
+
+class SlowRequestLog:
+    """Writes requests slower than ``threshold_ms`` as JSON lines to a size-rotated file.
+
+    Request handlers only put the entry on a bounded queue; a daemon thread does the file I/O. When
+    the queue is full, entries are dropped and counted instead of blocking the request. With
+    ``per_process`` each process writes ``<path>.<pid>``, so forked workers never rotate one file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold_ms: float,
+        max_bytes: int = 1_048_576,
+        backup_count: int = 3,
+        max_queue: int = 1000,
+        per_process: bool = False,
+    ) -> None:
+        self.path = path
+        self.per_process = per_process
+        self.threshold_ms = threshold_ms
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.logged = 0
+        self.dropped = 0
+        self.version = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0 and bool(self.path)
+
+    def maybe_log(self, method: str, path: str, status_code: int, timings: RequestTimings, total_ms: float) -> bool:
+        if not self.enabled or total_ms < self.threshold_ms:
+            return False
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "method": method,
+            "path": path,
+            "status": status_code,
+            "total_ms": round(total_ms, 2),
+            "stages_ms": {name: round(ms, 2) for name, ms in timings.stages.items()},
+            "text_length": None if timings.text is None else len(timings.text),
+            "text_sha256": None,
+            "matched_term_count": timings.matched_count,
+        }
+        if timings.text is not None:
+            entry["text_sha256"] = hashlib.sha256(timings.text.encode("utf-8", "surrogatepass")).hexdigest()
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self.version += 1
+            return False
+        return True
+
+    @property
+    def file_path(self) -> str:
+        return f"{self.path}.{os.getpid()}" if self.per_process else self.path
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, name="slow-request-log", daemon=True)
+                self._thread.start()
+
+    def _write_loop(self) -> None:
+        handler = logging.handlers.RotatingFileHandler(
+            self.file_path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8", delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        while True:
+            entry = self._queue.get()
+            handler.emit(logging.makeLogRecord({"msg": json.dumps(entry, separators=(",", ":"))}))
+            with self._lock:
+                self.logged += 1
+                self.version += 1
+            self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every queued entry has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold_ms,
+                "logged": self.logged,
+                "dropped": self.dropped,
+                "queued": self._queue.qsize(),
+            }
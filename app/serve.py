@@ -0,0 +1,142 @@
+"""Pre-forking server entry point.
+
+Usage:
+    python -m app.serve --host 127.0.0.1 --port 8000 --workers 4
+
+``uvicorn --workers`` spawns fresh interpreters, so every worker re-reads ``.env`` and rebuilds the
+term table and the matcher. This runner imports ``main`` once in the parent and freezes the heap
+with ``gc.freeze()``. It then forks the workers from that state onto one shared listening socket,
+so the workers share the table pages copy-on-write. A worker that dies is re-forked from the
+preloaded parent instead of paying the import cost again. The local AI model is not preloaded, and
+each worker loads it on first use.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import time
+
+from dotenv import load_dotenv
+
+
+def _log(message: str) -> None:
+    print(f"[SERVE] {message}", file=sys.stderr, flush=True)
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, log_level: str) -> None:
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def _supervise(app, sock: socket.socket, workers: int, log_level: str) -> int:
+    children: set[int] = set()
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            # The child must not inherit the supervisor's handler or its sibling pids: uvicorn
+            # re-raises SIGTERM after shutdown, which would otherwise run ``stop`` in the child.
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            children.clear()
+            gc.enable()
+            code = 0
+            try:
+                _run_worker(app, sock, log_level)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    def stop(signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+    _log(f"forked {workers} workers: {sorted(children)}")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            _log(f"worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; re-forking")
+            time.sleep(1)
+            # A SIGTERM that arrived during the back-off has already stopped the other workers.
+            if not stopping:
+                spawn()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description="Preload safecomms and fork workers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SAFECOMMS_WORKERS", "1")))
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    # ``.env`` can set the worker count, and ``main`` reads the rest of it before its app imports.
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+
+    # Objects allocated while preloading must not be moved or touched by collections in the workers,
+    # so collection stays off until the heap is frozen.
+    gc.disable()
+    # Workers re-forked from this parent share one health run, so a new probe leader keeps the counters.
+    os.environ.setdefault("SAFECOMMS_HEALTH_GROUP", f"serve-{os.getpid()}")
+    # ``main`` switches to shared admin sessions when it will run in several workers.
+    os.environ["SAFECOMMS_WORKERS"] = str(max(1, args.workers))
+    from app.startup import STARTUP_TIMINGS
+
+    with STARTUP_TIMINGS.phase("import_main"):
+        import main as app_module
+    with STARTUP_TIMINGS.phase("gc_freeze"):
+        gc.freeze()
+    _log(f"preloaded in {json.dumps(STARTUP_TIMINGS.snapshot()['phases_ms'])}, {gc.get_freeze_count()} objects frozen")
+
+    sock = _bind(args.host, args.port, args.backlog)
+    _log(f"listening on {args.host}:{args.port}")
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        gc.enable()
+        _run_worker(app_module.app, sock, args.log_level)
+        return 0
+    return _supervise(app_module.app, sock, args.workers, args.log_level)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import secrets
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from time import time
+
+
+class SessionStore:
+    """Admin session tokens with bounded memory.
+
+    Tokens map to their expiry in a dict, so validation is one lookup. A min-heap ordered by expiry
+    lets ``sweep`` drop expired sessions without scanning them all. Revoked tokens leave stale heap
+    entries behind; those are skipped when popped, and the heap is rebuilt once they outnumber the live
+    sessions. At ``max_sessions`` the session closest to expiry is evicted to make room.
+    """
+
+    shared = False
+
+    def __init__(self, ttl_seconds: int, max_sessions: int = 1000, clock=time) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self._clock = clock
+        self._lock = Lock()
+        self._expiry: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.revoked = 0
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def create(self) -> str:
+        token = secrets.token_urlsafe(32)
+        expires_at = self._clock() + self.ttl_seconds
+        with self._lock:
+            self._sweep(self._clock())
+            while len(self._expiry) >= self.max_sessions and self._pop_live() is not None:
+                self.evicted += 1
+            self._expiry[token] = expires_at
+            heapq.heappush(self._heap, (expires_at, token))
+            self.created += 1
+            self.version += 1
+        return token
+
+    def validate(self, token: str | None) -> bool:
+        if not token:
+            return False
+        expires_at = self._expiry.get(token)
+        if expires_at is None:
+            return False
+        if expires_at <= self._clock():
+            self.revoke(token, expired=True)
+            return False
+        return True
+
+    def revoke(self, token: str | None, expired: bool = False) -> bool:
+        if not token:
+            return False
+        with self._lock:
+            if self._expiry.pop(token, None) is None:
+                return False
+            if expired:
+                self.expired += 1
+            else:
+                self.revoked += 1
+            self.version += 1
+            if len(self._heap) > 2 * len(self._expiry) + 64:
+                self._heap = [(exp, tok) for tok, exp in self._expiry.items()]
+                heapq.heapify(self._heap)
+        return True
+
+    def _pop_live(self) -> str | None:
+        while self._heap:
+            expires_at, token = heapq.heappop(self._heap)
+            if self._expiry.get(token) == expires_at:
+                del self._expiry[token]
+                return token
+        return None
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, token = heapq.heappop(self._heap)
+            if self._expiry.get(token) == expires_at:
+                del self._expiry[token]
+                removed += 1
+        if removed:
+            self.expired += removed
+            self.version += 1
+        return removed
+
+    def sweep(self) -> int:
+        """Drop every expired session and return how many were removed."""
+        with self._lock:
+            return self._sweep(self._clock())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "active": len(self._expiry),
+                "max_sessions": self.max_sessions,
+                "created": self.created,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "revoked": self.revoked,
+            }
+
+
+class SharedSessionStore:
+    """``SessionStore`` interface backed by SQLite, for several workers serving one admin login.
+
+    Only a SHA-256 of each token is stored. Validation is a primary-key lookup, and the index on
+    ``expires_at`` plays the role of the heap for sweeps and for evicting the session closest to expiry.
+    Counters live in the same file, so every worker reports the same numbers.
+    """
+
+    shared = True
+    _COUNTERS = ("created", "expired", "evicted", "revoked", "version")
+
+    def __init__(self, db_path: str, ttl_seconds: int, max_sessions: int = 1000, clock=time) -> None:
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self._clock = clock
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS admin_sessions (token_hash TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS admin_sessions_expiry ON admin_sessions(expires_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS admin_session_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.executemany(
+                "INSERT OR IGNORE INTO admin_session_meta(key, value) VALUES (?, 0)", [(k,) for k in self._COUNTERS]
+            )
+
+    @contextmanager
+    def _conn(self):
+        conn = sqlite3.connect(self.db_path, timeout=10.0)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, key: str, amount: int = 1) -> None:
+        conn.execute("UPDATE admin_session_meta SET value = value + ? WHERE key = ?", (amount, key))
+        conn.execute("UPDATE admin_session_meta SET value = value + 1 WHERE key = 'version'")
+
+    def __len__(self) -> int:
+        with self._conn() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM admin_sessions").fetchone()[0])
+
+    @property
+    def version(self) -> int:
+        with self._conn() as conn:
+            return int(conn.execute("SELECT value FROM admin_session_meta WHERE key = 'version'").fetchone()[0])
+
+    def _sweep(self, conn: sqlite3.Connection, now: float) -> int:
+        removed = conn.execute("DELETE FROM admin_sessions WHERE expires_at <= ?", (now,)).rowcount
+        if removed:
+            self._bump(conn, "expired", removed)
+        return removed
+
+    def create(self) -> str:
+        token = secrets.token_urlsafe(32)
+        now = self._clock()
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._sweep(conn, now)
+            active = conn.execute("SELECT COUNT(*) FROM admin_sessions").fetchone()[0]
+            excess = active - self.max_sessions + 1
+            if excess > 0:
+                conn.execute(
+                    """
+                    DELETE FROM admin_sessions WHERE token_hash IN (
+                        SELECT token_hash FROM admin_sessions ORDER BY expires_at LIMIT ?
+                    )
+                    """,
+                    (excess,),
+                )
+                self._bump(conn, "evicted", excess)
+            conn.execute(
+                "INSERT INTO admin_sessions(token_hash, expires_at) VALUES (?, ?)",
+                (self._hash(token), now + self.ttl_seconds),
+            )
+            self._bump(conn, "created")
+        return token
+
+    def validate(self, token: str | None) -> bool:
+        if not token:
+            return False
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT expires_at FROM admin_sessions WHERE token_hash = ?", (self._hash(token),)
+            ).fetchone()
+        if row is None:
+            return False
+        if row[0] <= self._clock():
+            self.revoke(token, expired=True)
+            return False
+        return True
+
+    def revoke(self, token: str | None, expired: bool = False) -> bool:
+        if not token:
+            return False
+        with self._conn() as conn:
+            removed = conn.execute("DELETE FROM admin_sessions WHERE token_hash = ?", (self._hash(token),)).rowcount
+            if removed:
+                self._bump(conn, "expired" if expired else "revoked")
+        return bool(removed)
+
+    def sweep(self) -> int:
+        with self._conn() as conn:
+            return self._sweep(conn, self._clock())
+
+    def snapshot(self) -> dict:
+        with self._conn() as conn:
+            counters = dict(conn.execute("SELECT key, value FROM admin_session_meta").fetchall())
+            active = conn.execute("SELECT COUNT(*) FROM admin_sessions").fetchone()[0]
+        return {
+            "active": active,
+            "max_sessions": self.max_sessions,
+            "created": counters["created"],
+            "expired": counters["expired"],
+            "evicted": counters["evicted"],
+            "revoked": counters["revoked"],
+        }
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+
+
+class StartupTimings:
+    """Wall-clock durations of import-time and startup phases, reported in ``/health/metrics``."""
+
+    def __init__(self) -> None:
+        self._origin = perf_counter()
+        self._lock = Lock()
+        self.phases: dict[str, float] = {}
+        self.ready_ms: float | None = None
+        self.version = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = round((perf_counter() - start) * 1000.0, 2)
+                self.version += 1
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self.ready_ms = round((perf_counter() - self._origin) * 1000.0, 2)
+            self.version += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"phases_ms": dict(self.phases), "ready_ms": self.ready_ms}
+
+
+STARTUP_TIMINGS = StartupTimings()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+
+WORD = "word"
+RAW = "raw"
+PHRASE = "phrase"
+
+_WORD_RE = re.compile(r"\w+")
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_phrase(text: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[\W_]+", " ", text)).strip()
+
+
+@dataclass(frozen=True)
+class TermMatch:
+    term: str
+    start: int
+    end: int
+    mask: int
+    kind: str
+
+
+class _AnchoredIndex:
+    """Substring index keyed on the first non-alphanumeric char of each pattern.
+
+    Every pattern is split into an alphanumeric ``head`` and a ``rest`` starting at the anchor char.
+    At each anchor char in the text only the heads that end right before it are looked up, so the
+    cost follows the number of anchor chars in the text instead of the number of patterns.
+    """
+
+    def __init__(self) -> None:
+        self._index: dict[str, dict[str, dict[int, dict[str, dict[str, int]]]]] = {}
+        self.max_head = 0
+        self.anchor_re: re.Pattern | None = None
+
+    def add(self, pattern: str, term: str, mask: int) -> None:
+        pos = next(i for i, char in enumerate(pattern) if not char.isalnum())
+        head, rest = pattern[:pos], pattern[pos:]
+        by_len = self._index.setdefault(pattern[pos], {}).setdefault(head, {})
+        owners = by_len.setdefault(len(rest), {}).setdefault(rest, {})
+        owners[term] = owners.get(term, 0) | mask
+        self.max_head = max(self.max_head, len(head))
+
+    def freeze(self) -> None:
+        if self._index:
+            self.anchor_re = re.compile("[" + "".join(re.escape(c) for c in sorted(self._index)) + "]")
+
+    def scan(self, text: str):
+        if self.anchor_re is None:
+            return
+        for m in self.anchor_re.finditer(text):
+            pos = m.start()
+            heads = self._index.get(text[pos])
+            if heads is None:
+                continue
+            first = pos
+            floor = max(0, pos - self.max_head)
+            while first > floor and text[first - 1].isalnum():
+                first -= 1
+            for start in range(first, pos + 1):
+                by_len = heads.get(text[start:pos])
+                if by_len is None:
+                    continue
+                for length, rests in by_len.items():
+                    owners = rests.get(text[pos : pos + length])
+                    if owners:
+                        for term, mask in owners.items():
+                            yield term, start, pos + length, mask
+
+
+class TermMatcher:
+    """Single-pass matcher reproducing ``_contains_term`` semantics for a whole term table.
+
+    - alphanumeric single words match as whole ``\\w+`` tokens (``\\bterm\\b``)
+    - other single words match as plain substrings of the lowered text
+    - multi-word terms match as substrings of the ``[\\W_]+``-normalized text
+    """
+
+    def __init__(self, terms: dict[str, list[str]], categories: list[str] | None = None) -> None:
+        # Each key of ``terms`` is one bit of the match mask; ``categories`` names the category each bit
+        # reports (several bits may share one). Category precedence follows first appearance.
+        self.categories = list(categories or terms)
+        if len(self.categories) != len(terms):
+            raise ValueError("One category per term group is required")
+        ranking: dict[str, int] = {}
+        self._ranks = [ranking.setdefault(category, len(ranking)) for category in self.categories]
+        self._words: dict[str, int] = {}
+        self._raw = _AnchoredIndex()
+        self._phrases = _AnchoredIndex()
+        self.max_term_length = 0
+
+        for idx, (category, values) in enumerate(terms.items()):
+            bit = 1 << idx
+            for term in values:
+                if not term:
+                    raise ValueError(f"Empty moderation term in category {category!r}")
+                self.max_term_length = max(self.max_term_length, len(term))
+                if " " not in term:
+                    if term.isalnum():
+                        self._words[term] = self._words.get(term, 0) | bit
+                    else:
+                        self._raw.add(term, term, bit)
+                    continue
+                phrase = normalize_phrase(term)
+                if " " not in phrase:
+                    raise ValueError(f"Multi-word moderation term normalizes to a single word: {term!r}")
+                self._phrases.add(phrase, term, bit)
+
+        self._raw.freeze()
+        self._phrases.freeze()
+
+    def category_for(self, mask: int) -> str:
+        best = -1
+        while mask:
+            bit = (mask & -mask).bit_length() - 1
+            if best < 0 or self._ranks[bit] < self._ranks[best]:
+                best = bit
+            mask &= mask - 1
+        return self.categories[best]
+
+    def scan(self, text: str) -> list[TermMatch]:
+        """Return every term occurrence in already-lowered ``text`` with offsets into ``text``."""
+        matches: list[TermMatch] = []
+
+        words = self._words
+        for m in _WORD_RE.finditer(text):
+            mask = words.get(m.group())
+            if mask:
+                matches.append(TermMatch(m.group(), m.start(), m.end(), mask, WORD))
+
+        for term, start, end, mask in self._raw.scan(text):
+            matches.append(TermMatch(term, start, end, mask, RAW))
+
+        if self._phrases.anchor_re is not None:
+            tokens = list(_TOKEN_RE.finditer(text))
+            if len(tokens) > 1:
+                normalized = " ".join(m.group() for m in tokens)
+                norm_starts: list[int] = []
+                pos = 0
+                for m in tokens:
+                    norm_starts.append(pos)
+                    pos += len(m.group()) + 1
+
+                def to_text(norm_pos: int) -> int:
+                    k = bisect_right(norm_starts, norm_pos) - 1
+                    return tokens[k].start() + (norm_pos - norm_starts[k])
+
+                for term, start, end, mask in self._phrases.scan(normalized):
+                    matches.append(TermMatch(term, to_text(start), to_text(end - 1) + 1, mask, PHRASE))
+
+        matches.sort(key=lambda match: (match.start, match.end, match.term))
+        return matches
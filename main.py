@@ -1,6 +1,7 @@
 import asyncio
 from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timezone
+from functools import partial
 import os
 from pathlib import Path
 from threading import Lock
@@ -8,101 +9,89 @@ from time import perf_counter
 import secrets
 
 from dotenv import load_dotenv
-from fastapi import Cookie, Depends, FastAPI, Form, HTTPException, Query, Request, status
-from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from fastapi import (
+    Cookie,
+    Depends,
+    FastAPI,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-
-from app.admin_store import AdminStore
-from app.local_toxic_model import ai_check_to_response
-from app.models import AudioCheckRequest, CheckResponse, ErrorReportRequest, ErrorResolveRequest, TextCheckRequest
-from app.moderation import moderate_text
-
-load_dotenv()
+from pydantic import ValidationError
+
+from app.startup import STARTUP_TIMINGS
+
+# ``app.moderation`` reads MODERATION_PROFILES_PATH when it is imported, so ``.env`` is loaded first.
+with STARTUP_TIMINGS.phase("dotenv"):
+    load_dotenv()
+
+from app.admin_store import AdminStore  # noqa: E402
+from app.admission import AdmissionController, AdmissionRejected  # noqa: E402
+from app.executors import DATABASE, MODEL, RULES, WorkloadExecutors  # noqa: E402
+from app.health_broadcast import HealthBroadcaster  # noqa: E402
+from app.health_store import HealthState, ProbeLeader  # noqa: E402
+from app.live_moderation import TranscriptSession  # noqa: E402
+from app.local_toxic_model import ai_check_to_response  # noqa: E402
+from app.models import (  # noqa: E402
+    AudioCheckRequest,
+    CheckResponse,
+    ErrorReportRequest,
+    ErrorResolveRequest,
+    FuzzyMatch,
+    MatchSpan,
+    TextCheckRequest,
+    TranscriptFragment,
+)
+from app.moderation import (  # noqa: E402
+    OBFUSCATED_TERMS,
+    PROFILES,
+    TERM_MATCHER,
+    ModerationResult,
+    analyze_text,
+    moderate_text,
+)
+from app.request_timing import SlowRequestLog, add_stage, current_timings, stage, start_request  # noqa: E402
+from app.session_store import SessionStore, SharedSessionStore  # noqa: E402
 
 BASE_DIR = Path(__file__).resolve().parent
 PUBLIC_DIR = BASE_DIR / "public"
 
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "")
 ADMIN_DB_PATH = os.getenv("ADMIN_DB_PATH", "safecomms_admin.db")
+HEALTH_DB_PATH = os.getenv("HEALTH_DB_PATH", ADMIN_DB_PATH)
+HEALTH_LOCK_PATH = os.getenv("HEALTH_LOCK_PATH", f"{HEALTH_DB_PATH}.probe.lock")
 ADMIN_SESSION_TTL_SECONDS = int(os.getenv("ADMIN_SESSION_TTL_SECONDS", "43200"))
+ADMIN_MAX_SESSIONS = int(os.getenv("ADMIN_MAX_SESSIONS", "1000"))
+ADMIN_SESSION_SWEEP_SECONDS = float(os.getenv("ADMIN_SESSION_SWEEP_SECONDS", "60"))
+SAFECOMMS_WORKERS = int(os.getenv("SAFECOMMS_WORKERS", "1"))
 RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "0").lower() in {"1", "true", "yes", "on"}
 RATE_LIMIT_MAX_REQUESTS = int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "120"))
 RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+HEALTH_STREAM_INTERVAL_SECONDS = float(os.getenv("HEALTH_STREAM_INTERVAL_SECONDS", "5"))
 RATE_LIMIT_PATH_PREFIXES = tuple(
     p.strip() for p in os.getenv("RATE_LIMIT_PATH_PREFIXES", "/check").split(",") if p.strip()
 )
-admin_store = AdminStore(ADMIN_DB_PATH)
-
-
-class HealthState:
-    def __init__(self, probe_interval_seconds: int = 300, max_errors: int = 200) -> None:
-        self.probe_interval_seconds = probe_interval_seconds
-        self.max_errors = max_errors
-        self.started_at = datetime.now(timezone.utc)
-        self.last_probe_at: datetime | None = None
-        self.last_probe_success: bool | None = None
-        self.last_probe_error: str | None = None
-        self.last_response_ms: float | None = None
-        self.total_probes = 0
-        self.failed_probes = 0
-        self.last_failure_at: datetime | None = None
-        self.errors: list[dict[str, str]] = []
-        self._lock = Lock()
-
-    def record_probe(self, success: bool, response_ms: float, error: str | None = None) -> None:
-        now = datetime.now(timezone.utc)
-        with self._lock:
-            self.last_probe_at = now
-            self.last_probe_success = success
-            self.last_response_ms = round(response_ms, 2)
-            self.last_probe_error = error
-            self.total_probes += 1
-            if not success:
-                self.failed_probes += 1
-                self.last_failure_at = now
-
-    def record_error(self, path: str, error: str) -> None:
-        entry = {
-            "time": datetime.now(timezone.utc).isoformat(),
-            "path": path,
-            "error": error,
-        }
-        with self._lock:
-            self.errors.append(entry)
-            if len(self.errors) > self.max_errors:
-                self.errors = self.errors[-self.max_errors :]
-
-    def snapshot(self) -> dict:
-        now = datetime.now(timezone.utc)
-        with self._lock:
-            uptime_seconds = max(0.0, (now - self.started_at).total_seconds())
-            downtime_seconds = float(self.failed_probes * self.probe_interval_seconds)
-            if self.last_failure_at is None:
-                steady_uptime_seconds = uptime_seconds
-            else:
-                steady_uptime_seconds = max(0.0, (now - self.last_failure_at).total_seconds())
-
-            availability = 100.0
-            if self.total_probes > 0:
-                availability = (1.0 - (self.failed_probes / self.total_probes)) * 100.0
-
-            return {
-                "started_at": self.started_at.isoformat(),
-                "now": now.isoformat(),
-                "probe_interval_seconds": self.probe_interval_seconds,
-                "uptime_seconds": round(uptime_seconds, 2),
-                "steady_uptime_seconds": round(steady_uptime_seconds, 2),
-                "downtime_seconds": round(downtime_seconds, 2),
-                "total_probes": self.total_probes,
-                "failed_probes": self.failed_probes,
-                "availability_percent": round(availability, 4),
-                "last_probe_at": self.last_probe_at.isoformat() if self.last_probe_at else None,
-                "last_probe_success": self.last_probe_success,
-                "last_probe_error": self.last_probe_error,
-                "last_response_ms": self.last_response_ms,
-                "reported_error_count": len(self.errors),
-                "recent_errors": list(self.errors[-50:]),
-            }
+AI_MAX_INFLIGHT = int(os.getenv("AI_MAX_INFLIGHT", "2"))
+AI_MAX_QUEUE = int(os.getenv("AI_MAX_QUEUE", "8"))
+AI_MAX_PRIORITY_QUEUE = int(os.getenv("AI_MAX_PRIORITY_QUEUE", "4"))
+AI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("AI_QUEUE_TIMEOUT_SECONDS", "10"))
+AI_PRIORITY_API_KEYS = tuple(k.strip() for k in os.getenv("AI_PRIORITY_API_KEYS", "").split(",") if k.strip())
+RULE_THREADS = int(os.getenv("RULE_THREADS", "4"))
+MODEL_THREADS = int(os.getenv("MODEL_THREADS", str(AI_MAX_INFLIGHT)))
+DB_THREADS = int(os.getenv("DB_THREADS", "2"))
+SLOW_LOG_PATH = os.getenv("SLOW_LOG_PATH", "safecomms_slow.log")
+SLOW_LOG_THRESHOLD_MS = float(os.getenv("SLOW_LOG_THRESHOLD_MS", "500"))
+SLOW_LOG_MAX_BYTES = int(os.getenv("SLOW_LOG_MAX_BYTES", "1048576"))
+SLOW_LOG_BACKUP_COUNT = int(os.getenv("SLOW_LOG_BACKUP_COUNT", "3"))
+with STARTUP_TIMINGS.phase("admin_store"):
+    admin_store = AdminStore(ADMIN_DB_PATH)
 
 
 class RateLimiter:
@@ -145,43 +134,87 @@ class RateLimiter:
 def get_health_state() -> HealthState:
     state = getattr(app.state, "health_state", None)
     if state is None:
-        state = HealthState(probe_interval_seconds=300)
+        state = HealthState(db_path=HEALTH_DB_PATH, probe_interval_seconds=300)
         app.state.health_state = state
     return state
 
 
-def get_admin_sessions() -> dict[str, float]:
+def get_health_broadcaster() -> HealthBroadcaster:
+    broadcaster = getattr(app.state, "health_broadcaster", None)
+    if broadcaster is None:
+        broadcaster = HealthBroadcaster(
+            version=_metrics_etag,
+            build=_build_metrics,
+            interval_seconds=HEALTH_STREAM_INTERVAL_SECONDS,
+            run=partial(executors.run_untracked, DATABASE),
+        )
+        app.state.health_broadcaster = broadcaster
+    return broadcaster
+
+
+def get_admin_sessions() -> SessionStore | SharedSessionStore:
     sessions = getattr(app.state, "admin_sessions", None)
     if sessions is None:
-        sessions = {}
+        if SAFECOMMS_WORKERS > 1:
+            # A login must be valid on whichever worker serves the next request.
+            sessions = SharedSessionStore(
+                ADMIN_DB_PATH, ttl_seconds=ADMIN_SESSION_TTL_SECONDS, max_sessions=ADMIN_MAX_SESSIONS
+            )
+        else:
+            sessions = SessionStore(ttl_seconds=ADMIN_SESSION_TTL_SECONDS, max_sessions=ADMIN_MAX_SESSIONS)
         app.state.admin_sessions = sessions
     return sessions
 
 
+async def _sessions(method: str, *args):
+    sessions = get_admin_sessions()
+    if sessions.shared:
+        return await executors.run(DATABASE, getattr(sessions, method), *args)
+    return getattr(sessions, method)(*args)
+
+
 def _now_ts() -> float:
     return datetime.now(timezone.utc).timestamp()
 
 
-def _is_valid_admin_session(token: str | None) -> bool:
+async def _is_valid_admin_session(token: str | None) -> bool:
     if not token:
         return False
-    sessions = get_admin_sessions()
-    exp = sessions.get(token)
-    if exp is None:
-        return False
-    if exp < _now_ts():
-        sessions.pop(token, None)
-        return False
-    return True
+    return await _sessions("validate", token)
+
+
+async def moderation_profile(profile: str | None = Query(default=None, max_length=64)) -> str | None:
+    if profile is not None and profile not in PROFILES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"unknown moderation profile: {profile}",
+        )
+    return profile
+
 
+async def ai_priority(
+    admin_session: str | None = Cookie(default=None),
+    x_api_key: str | None = Header(default=None),
+) -> bool:
+    if x_api_key and any(secrets.compare_digest(x_api_key, key) for key in AI_PRIORITY_API_KEYS):
+        return True
+    return await _is_valid_admin_session(admin_session)
 
-def require_admin_session(admin_session: str | None = Cookie(default=None)) -> None:
-    if not _is_valid_admin_session(admin_session):
+
+async def require_admin_session(admin_session: str | None = Cookie(default=None)) -> None:
+    if not await _is_valid_admin_session(admin_session):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="admin session required")
 
 
-async def _run_probe_loop(health_state: HealthState) -> None:
+async def _run_probe_loop(health_state: HealthState, leader: ProbeLeader) -> None:
+    # Every worker runs this loop, but only the lock holder probes; the others retry the lock each
+    # interval so one of them takes over if the leader exits.
     while True:
+        if not leader.is_leader:
+            if not leader.try_acquire():
+                await asyncio.sleep(health_state.probe_interval_seconds)
+                continue
+            await executors.run(DATABASE, health_state.claim_leadership)
         start = perf_counter()
         success = True
         err: str | None = None
@@ -191,21 +224,32 @@ async def _run_probe_loop(health_state: HealthState) -> None:
             success = False
             err = str(exc)
         duration_ms = (perf_counter() - start) * 1000.0
-        health_state.record_probe(success=success, response_ms=duration_ms, error=err)
+        await executors.run(DATABASE, health_state.record_probe, success, duration_ms, err)
         await asyncio.sleep(health_state.probe_interval_seconds)
 
 
+async def _run_session_sweep() -> None:
+    while True:
+        await asyncio.sleep(ADMIN_SESSION_SWEEP_SECONDS)
+        await _sessions("sweep")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     health_state = get_health_state()
-    _ = get_admin_sessions()
-    probe_task = asyncio.create_task(_run_probe_loop(health_state))
+    sweep_task = asyncio.create_task(_run_session_sweep())
+    leader = ProbeLeader(HEALTH_LOCK_PATH)
+    probe_task = asyncio.create_task(_run_probe_loop(health_state, leader))
+    STARTUP_TIMINGS.mark_ready()
     try:
         yield
     finally:
-        probe_task.cancel()
-        with suppress(asyncio.CancelledError):
-            await probe_task
+        for task in (probe_task, sweep_task):
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        leader.release()
+        await get_health_broadcaster().close()
 
 
 app = FastAPI(title="safecomms API", version="2.6.0", lifespan=lifespan)
@@ -218,6 +262,24 @@ rate_limiter = RateLimiter(
 )
 
 
+ai_admission = AdmissionController(
+    max_inflight=AI_MAX_INFLIGHT,
+    max_queue=AI_MAX_QUEUE,
+    max_priority_queue=AI_MAX_PRIORITY_QUEUE,
+    max_wait_seconds=AI_QUEUE_TIMEOUT_SECONDS,
+)
+# Rule checks, model inference and SQLite each get their own thread budget, so a queue of slow model
+# calls cannot hold the threads that cheap rule checks and admin queries need.
+executors = WorkloadExecutors({RULES: RULE_THREADS, MODEL: MODEL_THREADS, DATABASE: DB_THREADS})
+slow_log = SlowRequestLog(
+    path=SLOW_LOG_PATH,
+    threshold_ms=SLOW_LOG_THRESHOLD_MS,
+    max_bytes=SLOW_LOG_MAX_BYTES,
+    backup_count=SLOW_LOG_BACKUP_COUNT,
+    per_process=SAFECOMMS_WORKERS > 1,
+)
+
+
 def _request_ip(request: Request) -> str:
     forwarded_for = request.headers.get("x-forwarded-for", "")
     if forwarded_for:
@@ -248,57 +310,127 @@ async def enforce_rate_limit(request: Request, call_next):
 async def report_errors(request: Request, call_next):
     try:
         response = await call_next(request)
-        if response.status_code >= 500:
-            get_health_state().record_error(request.url.path, f"http_{response.status_code}")
-            admin_store.report_error("runtime", request.url.path, f"http_{response.status_code}")
+        # Deliberate load shedding is not an error and must not cost a SQLite write per request.
+        if response.status_code >= 500 and "x-load-shed" not in response.headers:
+            with stage("report"):
+                await executors.run(
+                    DATABASE, admin_store.report_error, "runtime", request.url.path, f"http_{response.status_code}"
+                )
         return response
     except Exception as exc:
-        get_health_state().record_error(request.url.path, str(exc))
-        admin_store.report_error("runtime", request.url.path, str(exc))
+        await executors.run(DATABASE, admin_store.report_error, "runtime", request.url.path, str(exc))
         raise
 
 
+@app.middleware("http")
+async def time_checks(request: Request, call_next):
+    # Registered last so it wraps the other middleware and also times the error-report write.
+    if not request.url.path.startswith("/check/"):
+        return await call_next(request)
+    timings = start_request()
+    response = await call_next(request)
+    total_ms = timings.total_ms()
+    response.headers["Server-Timing"] = timings.header(total_ms)
+    slow_log.maybe_log(request.method, request.url.path, response.status_code, timings, total_ms)
+    return response
+
+
+def _note_check(text: str, matched_count: int) -> None:
+    timings = current_timings()
+    if timings is not None:
+        timings.note(text, matched_count)
+
+
 @app.get("/health")
-def health_dashboard() -> FileResponse:
+async def health_dashboard() -> FileResponse:
     return FileResponse(PUBLIC_DIR / "health.html")
 
 
 @app.get("/health/status")
-def health_status() -> dict:
+async def health_status() -> dict:
     return {"status": "ok", "time": datetime.now(timezone.utc).isoformat()}
 
 
-@app.get("/health/metrics")
-def health_metrics() -> dict:
+def _metrics_etag() -> str:
+    versions = (
+        get_health_state().version,
+        admin_store.revision(),
+        STARTUP_TIMINGS.version,
+        ai_admission.version,
+        get_admin_sessions().version,
+        executors.version,
+        slow_log.version,
+    )
+    return 'W/"' + "-".join(str(v) for v in versions) + '"'
+
+
+def _build_metrics() -> dict:
     out = get_health_state().snapshot()
-    reports = admin_store.list_error_reports(include_resolved=True)
-    out["reported_error_count"] = len(reports)
+    reports = admin_store.list_error_reports(include_resolved=True, limit=50)
+    out["reported_error_count"] = admin_store.count_error_reports()
     out["recent_errors"] = [
         {
             "time": r["created_at"],
             "path": r["path"],
             "error": f"{r['source']}: {r['message']}" + (" [resolved]" if r.get("resolved_at") else ""),
         }
-        for r in reports[:50]
+        for r in reports
     ]
+    out["startup"] = STARTUP_TIMINGS.snapshot()
+    out["ai_admission"] = ai_admission.snapshot()
+    out["executors"] = executors.snapshot()
+    out["slow_log"] = slow_log.snapshot()
+    out["admin_sessions"] = get_admin_sessions().snapshot()
     return out
 
 
+@app.get("/health/metrics")
+async def health_metrics(request: Request) -> Response:
+    etag = await executors.run_untracked(DATABASE, _metrics_etag)
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in {tag.strip() for tag in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    metrics = await executors.run_untracked(DATABASE, _build_metrics)
+    return JSONResponse(metrics, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@app.get("/health/stream")
+async def health_stream() -> StreamingResponse:
+    broadcaster = get_health_broadcaster()
+
+    async def events():
+        queue, snapshot = await broadcaster.subscribe()
+        try:
+            yield broadcaster.format_event("snapshot", snapshot)
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/admin-verify")
-def admin_verify_page() -> FileResponse:
+async def admin_verify_page() -> FileResponse:
     return FileResponse(PUBLIC_DIR / "admin_verify.html")
 
 
 @app.post("/admin-verify")
-def admin_verify(password: str = Form(...)):
+async def admin_verify(password: str = Form(...)):
     if not ADMIN_PASSWORD:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="admin password not configured")
 
     if not secrets.compare_digest(password, ADMIN_PASSWORD):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid admin password")
 
-    token = secrets.token_urlsafe(32)
-    get_admin_sessions()[token] = _now_ts() + ADMIN_SESSION_TTL_SECONDS
+    token = await _sessions("create")
 
     response = RedirectResponse(url="/admin", status_code=status.HTTP_303_SEE_OTHER)
     response.set_cookie(
@@ -312,79 +444,164 @@ def admin_verify(password: str = Form(...)):
 
 
 @app.post("/admin/logout")
-def admin_logout():
+async def admin_logout(admin_session: str | None = Cookie(default=None)):
+    await _sessions("revoke", admin_session)
     response = RedirectResponse(url="/admin-verify", status_code=status.HTTP_303_SEE_OTHER)
     response.delete_cookie("admin_session")
     return response
 
 
 @app.get("/admin")
-def admin_dashboard(admin_session: str | None = Cookie(default=None)):
-    if not _is_valid_admin_session(admin_session):
+async def admin_dashboard(admin_session: str | None = Cookie(default=None)):
+    if not await _is_valid_admin_session(admin_session):
         return RedirectResponse(url="/admin-verify", status_code=status.HTTP_303_SEE_OTHER)
     return FileResponse(PUBLIC_DIR / "admin.html")
 
 
 @app.get("/admin/api/errors")
-def admin_list_errors(
+async def admin_list_errors(
     include_resolved: bool = Query(default=True),
     _: None = Depends(require_admin_session),
 ) -> dict:
-    return {"errors": admin_store.list_error_reports(include_resolved=include_resolved)}
+    reports = await executors.run(DATABASE, admin_store.list_error_reports, include_resolved=include_resolved)
+    return {"errors": reports}
 
 
 @app.post("/admin/api/errors/report")
-def admin_report_error(payload: ErrorReportRequest, _: None = Depends(require_admin_session)) -> dict:
-    row = admin_store.report_error("manual", payload.path, payload.message)
-    return row
+async def admin_report_error(payload: ErrorReportRequest, _: None = Depends(require_admin_session)) -> dict:
+    return await executors.run(DATABASE, admin_store.report_error, "manual", payload.path, payload.message)
 
 
 @app.post("/admin/api/errors/{report_id}/resolve")
-def admin_resolve_error(
+async def admin_resolve_error(
     report_id: int,
     payload: ErrorResolveRequest,
     _: None = Depends(require_admin_session),
 ) -> dict:
-    ok = admin_store.resolve_error(report_id, payload.resolved_by)
+    ok = await executors.run(DATABASE, admin_store.resolve_error, report_id, payload.resolved_by)
     if not ok:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="error report not found or already resolved")
     return {"status": "resolved", "report_id": report_id}
 
 
 @app.delete("/admin/api/errors/{report_id}")
-def admin_delete_error(report_id: int, _: None = Depends(require_admin_session)) -> dict:
-    ok = admin_store.delete_error(report_id)
+async def admin_delete_error(report_id: int, _: None = Depends(require_admin_session)) -> dict:
+    ok = await executors.run(DATABASE, admin_store.delete_error, report_id)
     if not ok:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="error report not found")
     return {"status": "deleted", "report_id": report_id}
 
 
 @app.get("/")
-def index() -> FileResponse:
+async def index() -> FileResponse:
     return FileResponse(PUBLIC_DIR / "index.html")
 
 
-@app.post("/check/text", response_model=CheckResponse)
-def check_text(payload: TextCheckRequest) -> CheckResponse:
-    safe, category, matched_terms, reason = moderate_text(payload.text)
-    return CheckResponse(safe=safe, category=category, matched_terms=matched_terms, reason=reason)
+def _check_response(result: ModerationResult) -> CheckResponse:
+    fuzzy_matches = None
+    if result.fuzzy_matches is not None:
+        fuzzy_matches = [
+            FuzzyMatch(token=m.token, term=m.term, category=TERM_MATCHER.category_for(m.mask), distance=m.distance)
+            for m in result.fuzzy_matches
+        ]
+    matches = None
+    if result.spans is not None:
+        matches = [
+            MatchSpan(
+                term=m.term,
+                category=TERM_MATCHER.category_for(m.mask),
+                start=m.start,
+                end=m.end,
+                match_type="deobfuscated" if m.term in OBFUSCATED_TERMS else "direct",
+            )
+            for m in result.spans
+        ]
+    return CheckResponse(
+        safe=result.safe,
+        category=result.category,
+        matched_terms=result.matched_terms,
+        reason=result.reason,
+        fuzzy_matches=fuzzy_matches,
+        matches=matches,
+    )
 
 
-@app.post("/check/audio", response_model=CheckResponse)
-def check_audio(payload: AudioCheckRequest) -> CheckResponse:
-    safe, category, matched_terms, reason = moderate_text(payload.transcript)
-    return CheckResponse(safe=safe, category=category, matched_terms=matched_terms, reason=reason)
+@app.post("/check/text", response_model=CheckResponse, response_model_exclude_none=True)
+async def check_text(
+    payload: TextCheckRequest,
+    profile: str | None = Depends(moderation_profile),
+    fuzzy: int = Query(default=0, ge=0, le=2),
+    spans: bool = Query(default=False),
+) -> CheckResponse:
+    result = await executors.run(
+        RULES, analyze_text, payload.text, profile=profile, fuzzy_distance=fuzzy, with_spans=spans
+    )
+    _note_check(payload.text, len(result.matched_terms))
+    return _check_response(result)
 
 
-@app.post("/check/text-ai", response_model=CheckResponse)
-def check_text_ai(
+@app.post("/check/audio", response_model=CheckResponse, response_model_exclude_none=True)
+async def check_audio(
+    payload: AudioCheckRequest,
+    profile: str | None = Depends(moderation_profile),
+    fuzzy: int = Query(default=0, ge=0, le=2),
+    spans: bool = Query(default=False),
+) -> CheckResponse:
+    result = await executors.run(
+        RULES, analyze_text, payload.transcript, profile=profile, fuzzy_distance=fuzzy, with_spans=spans
+    )
+    _note_check(payload.transcript, len(result.matched_terms))
+    return _check_response(result)
+
+
+@app.websocket("/check/audio/stream")
+async def check_audio_stream(websocket: WebSocket) -> None:
+    profile = websocket.query_params.get("profile")
+    if profile is not None and profile not in PROFILES:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=f"unknown moderation profile: {profile}")
+        return
+    await websocket.accept()
+    session = TranscriptSession(profile=profile)
+    try:
+        while True:
+            try:
+                fragment = TranscriptFragment.model_validate_json(await websocket.receive_text())
+            except ValidationError as exc:
+                await websocket.send_json({"detail": exc.errors(include_url=False, include_context=False)})
+                continue
+            verdict = await executors.run(RULES, session.feed, fragment.text, fragment.final)
+            await websocket.send_json(verdict.model_dump(exclude_none=True))
+            if fragment.final:
+                await websocket.close()
+                return
+    except WebSocketDisconnect:
+        return
+
+
+@app.post("/check/text-ai", response_model=CheckResponse, response_model_exclude_none=True)
+async def check_text_ai(
     payload: TextCheckRequest,
     threshold: float = Query(default=0.5, ge=0.0, le=1.0),
-) -> CheckResponse:
+    priority: bool = Depends(ai_priority),
+):
+    try:
+        add_stage("admission", await ai_admission.acquire(priority=priority))
+    except AdmissionRejected as exc:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": f"Local text model busy ({exc.reason})"},
+            headers={"Retry-After": str(exc.retry_after), "X-Load-Shed": "1"},
+        )
+
+    start = perf_counter()
     try:
-        return ai_check_to_response(payload.text, threshold=threshold)
+        result = await executors.run(MODEL, ai_check_to_response, payload.text, threshold)
+        _note_check(payload.text, len(result.matched_terms))
+        return result
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Local text model unavailable: {exc}",
         ) from exc
+    finally:
+        ai_admission.release(perf_counter() - start)
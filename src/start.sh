@@ -99,4 +99,8 @@ else
 fi
 
 log_ok "Fully installed. Starting API server..."
+if [[ "${SAFECOMMS_WORKERS:-1}" -gt 1 ]]; then
+  log_info "Preloading once and forking $SAFECOMMS_WORKERS workers"
+  exec python -m app.serve --host 127.0.0.1 --port 8000 --workers "$SAFECOMMS_WORKERS"
+fi
 exec uvicorn main:app --host 127.0.0.1 --port 8000 --reload
@@ -1,6 +1,15 @@
+import atexit
+import os
+import shutil
 import sys
+import tempfile
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+# ``main`` opens its SQLite files at import, so point them away from the tracked safecomms_admin.db first.
+_DB_DIR = tempfile.mkdtemp(prefix="safecomms-tests-")
+atexit.register(shutil.rmtree, _DB_DIR, ignore_errors=True)
+os.environ["ADMIN_DB_PATH"] = os.environ["HEALTH_DB_PATH"] = str(Path(_DB_DIR) / "admin.db")
@@ -1,7 +1,22 @@
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from time import perf_counter
+
 from fastapi.testclient import TestClient
 
 import main
+from app.admission import AdmissionController, AdmissionRejected
+from app.executors import MODEL, RULES, WorkloadExecutors
+from app.health_broadcast import HealthBroadcaster
+from app.health_store import HealthState, ProbeLeader
+from app.live_moderation import TranscriptSession
+from app.local_toxic_model import LocalToxicModel
 from app.moderation import BAD_TERMS, BASE_TERMS_COUNT, OBFUSCATED_TERMS_COUNT
+from app.request_timing import RequestTimings, SlowRequestLog
+from app.session_store import SessionStore, SharedSessionStore
 
 
 def setup_test_app():
@@ -35,6 +50,7 @@ def test_health_dashboard_and_metrics():
     assert "uptime_seconds" in data
     assert "downtime_seconds" in data
     assert "last_response_ms" in data
+    assert "term_table" in data["startup"]["phases_ms"]
 
 
 def test_admin_verify_flow():
@@ -186,3 +202,412 @@ def test_rate_limit_from_env_controls_requests():
         main.rate_limiter.window_seconds = original_window
         main.rate_limiter.path_prefixes = original_prefixes
         main.rate_limiter.clear()
+
+
+class _FakeTokenizer:
+    model_max_length = 8
+
+    def num_special_tokens_to_add(self) -> int:
+        return 2
+
+    def __call__(self, text, **_kwargs):
+        offsets = []
+        pos = 0
+        for word in text.split(" "):
+            offsets.append((pos, pos + len(word)))
+            pos += len(word) + 1
+        return {"offset_mapping": offsets}
+
+
+class _FakePipeline:
+    def __init__(self) -> None:
+        self.tokenizer = _FakeTokenizer()
+        self.calls: list[list[str]] = []
+
+    def __call__(self, inputs, **_kwargs):
+        self.calls.append(inputs)
+        return [
+            [
+                {"label": "toxic", "score": 0.9 if "bad" in chunk else 0.1},
+                {"label": "non-toxic", "score": 0.1 if "bad" in chunk else 0.9},
+            ]
+            for chunk in inputs
+        ]
+
+
+def test_local_model_scores_long_text_in_one_batch():
+    model = LocalToxicModel(max_windows=4, window_overlap=2)
+    model._pipeline = _FakePipeline()
+    text = " ".join(["fine"] * 30 + ["bad"])
+
+    out = model.classify(text)
+    assert out.label == "TOXIC"
+    assert out.score == 0.9
+    assert len(model._pipeline.calls) == 1
+    assert out.windows == 4
+    assert model._pipeline.calls[0][-1].endswith("bad")
+    # Four 6-token windows over 31 tokens leave gaps between them, which must be reported.
+    assert out.coverage == 24 / 31
+
+    uncapped = LocalToxicModel(max_windows=16, window_overlap=2)
+    uncapped._pipeline = _FakePipeline()
+    assert uncapped.classify(text).coverage == 1.0
+
+    mean_model = LocalToxicModel(max_windows=4, window_overlap=2, reducer="mean")
+    mean_model._pipeline = _FakePipeline()
+    assert mean_model.classify(text).label == "NON-TOXIC"
+
+
+def test_audio_stream_reports_terms_split_across_fragments():
+    client = setup_test_app()
+    with client.websocket_connect("/check/audio/stream") as ws:
+        ws.send_json({"text": "we talked about the weather and then he said ki"})
+        first = ws.receive_json()
+        assert first["safe"] is True
+        assert first["new_matches"] == []
+
+        ws.send_json({"text": "ll. later a phishing"})
+        second = ws.receive_json()
+        assert second["safe"] is False
+        assert [m["term"] for m in second["new_matches"]] == ["kill"]
+        start = second["new_matches"][0]["start"]
+        assert second["new_matches"][0]["end"] == start + 4
+
+        ws.send_json({"text": "-link arrived", "final": True})
+        third = ws.receive_json()
+        assert "phishing link" in [m["term"] for m in third["new_matches"]]
+        assert "kill" not in [m["term"] for m in third["new_matches"]]
+        assert "kill" in third["matched_terms"]
+        assert third["category"] == "violence"
+
+
+def test_transcript_session_holds_back_words_until_boundary():
+    session = TranscriptSession(overlap=80)
+    assert session.feed("this is a bomb").new_matches == []
+    assert session.feed("astic speech").new_matches == []
+
+    session = TranscriptSession(overlap=80)
+    text = "hello " * 200 + "bomb"
+    for i in range(0, len(text), 7):
+        session.feed(text[i : i + 7])
+    assert session._tail_start > 0
+    assert len(session._tail) <= 80
+    assert session.feed("", final=True).matched_terms == ["bomb"]
+
+
+def test_profiles_filter_shared_matcher_hits():
+    client = setup_test_app()
+    text = "gg, I will kill you with my aimbot"
+
+    default = client.post("/check/text", json={"text": text}).json()
+    assert default["category"] == "violence"
+    assert "aimbot" not in default["matched_terms"]
+
+    gaming = client.post("/check/text?profile=gaming", json={"text": text}).json()
+    assert gaming["safe"] is False
+    assert gaming["category"] == "cheating"
+    assert gaming["matched_terms"] == ["aimbot"]
+
+    kids = client.post("/check/audio?profile=kids", json={"transcript": "what is your home address"}).json()
+    assert kids["category"] == "personal_info"
+
+    unknown = client.post("/check/text?profile=nope", json={"text": text})
+    assert unknown.status_code == 422
+
+
+def test_health_metrics_conditional_get():
+    client = setup_test_app()
+    first = client.get("/health/metrics")
+    etag = first.headers["etag"]
+
+    cached = client.get("/health/metrics", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    main.admin_store.report_error("runtime", "/test", "boom")
+    changed = client.get("/health/metrics", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+    # Executor counters are part of the body, so a rule check must change the ETag too.
+    etag = changed.headers["etag"]
+    assert client.get("/health/metrics", headers={"If-None-Match": etag}).status_code == 304
+    client.post("/check/text", json={"text": "hello"})
+    assert client.get("/health/metrics", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_health_broadcaster_pushes_shared_deltas():
+    state = {"version": 1, "total_probes": 0, "locked": False}
+
+    def version():
+        if state["locked"]:
+            raise RuntimeError("database is locked")
+        return state["version"]
+
+    def build():
+        return {"now": "t", "uptime_seconds": 1.0, "total_probes": state["total_probes"], "recent_errors": []}
+
+    async def scenario():
+        broadcaster = HealthBroadcaster(version=version, build=build, interval_seconds=0.01)
+        q1, snap1 = await broadcaster.subscribe()
+        q2, snap2 = await broadcaster.subscribe()
+        assert snap1 == snap2
+        assert broadcaster.subscriber_count == 2
+
+        await asyncio.sleep(0.05)
+        assert q1.empty()
+
+        state.update(version=2, total_probes=3)
+        event = await asyncio.wait_for(q1.get(), timeout=1)
+        assert event == await asyncio.wait_for(q2.get(), timeout=1)
+        assert event.startswith("event: delta\n")
+        assert '"total_probes":3' in event
+        assert "recent_errors" not in event
+
+        # A failing refresh is retried on the next tick instead of ending the loop.
+        state["locked"] = True
+        await asyncio.sleep(0.05)
+        state.update(locked=False, version=3, total_probes=4)
+        event = await asyncio.wait_for(q1.get(), timeout=1)
+        assert '"total_probes":4' in event
+        await broadcaster.close()
+
+    asyncio.run(scenario())
+
+
+def test_fuzzy_matching_is_opt_in_and_reports_distance():
+    client = setup_test_app()
+    text = "the terorist planned a murdr"
+
+    exact = client.post("/check/text", json={"text": text}).json()
+    assert exact["safe"] is True
+    assert "fuzzy_matches" not in exact
+
+    fuzzy = client.post("/check/text?fuzzy=2", json={"text": text}).json()
+    assert fuzzy["safe"] is False
+    assert fuzzy["category"] == "violence"
+    assert {"terrorist", "murder"} <= set(fuzzy["matched_terms"])
+    by_token = {m["token"]: m for m in fuzzy["fuzzy_matches"]}
+    assert by_token["terorist"]["term"] == "terrorist"
+    assert by_token["terorist"]["distance"] == 1
+    assert by_token["murdr"]["distance"] == 1
+
+    for text in [
+        "a modest reward for my brother",
+        "an exclusive interview with the heroine",
+        "racism and terrorism are discussed",
+        "the explorers walked",
+    ]:
+        benign = client.post("/check/text?fuzzy=2", json={"text": text}).json()
+        assert benign["fuzzy_matches"] == [], text
+
+    # Inflections of the terms themselves are not typos of a safe word and must still be caught.
+    for text, term in [
+        ("terrorists attacked", "terrorist"),
+        ("the murderers", "murder"),
+        ("rapists", "rape"),
+        ("bombings", "bombing"),
+        ("the killers were caught", "killer"),
+        ("the rapist was convicted", "rape"),
+    ]:
+        inflected = client.post("/check/text?fuzzy=2", json={"text": text}).json()
+        assert inflected["safe"] is False, text
+        assert [m["term"] for m in inflected["fuzzy_matches"]] == [term], text
+
+    start = perf_counter()
+    long_word = client.post("/check/text?fuzzy=2", json={"text": "a" * 20000}).json()
+    assert long_word["fuzzy_matches"] == []
+    assert perf_counter() - start < 1.0
+
+
+def test_admission_controller_queues_prioritises_and_sheds():
+    async def scenario():
+        ctl = AdmissionController(max_inflight=1, max_queue=1, max_priority_queue=1, max_wait_seconds=1.0)
+        assert await ctl.acquire() == 0.0
+
+        normal = asyncio.create_task(ctl.acquire())
+        await asyncio.sleep(0)
+        try:
+            await ctl.acquire()
+            raise AssertionError("expected queue-full rejection")
+        except AdmissionRejected as exc:
+            assert exc.reason == "queue full"
+            assert exc.retry_after >= 1
+
+        priority = asyncio.create_task(ctl.acquire(priority=True))
+        await asyncio.sleep(0)
+        assert ctl.snapshot()["priority_queued"] == 1
+
+        ctl.release(0.05)
+        await asyncio.wait_for(priority, timeout=1)
+        assert not normal.done()
+
+        ctl.release(0.05)
+        assert await asyncio.wait_for(normal, timeout=1) > 0
+        ctl.release(0.05)
+        assert ctl.snapshot()["inflight"] == 0
+        assert ctl.snapshot()["rejected"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_text_ai_sheds_load_with_retry_after():
+    client = setup_test_app()
+    original = main.ai_admission
+    main.ai_admission = AdmissionController(max_inflight=1, max_queue=0, max_priority_queue=0)
+    try:
+        asyncio.run(main.ai_admission.acquire())
+        reports_before = len(main.admin_store.list_error_reports())
+        resp = client.post("/check/text-ai", json={"text": "hello"})
+        assert resp.status_code == 503
+        assert int(resp.headers["Retry-After"]) >= 1
+        assert len(main.admin_store.list_error_reports()) == reports_before
+        assert client.get("/health/metrics").json()["ai_admission"]["rejected"] == 1
+    finally:
+        main.ai_admission = original
+
+
+def test_rule_checks_do_not_wait_behind_model_threads():
+    executors = WorkloadExecutors({RULES: 1, MODEL: 1})
+    release = threading.Event()
+
+    async def scenario():
+        slow = [asyncio.create_task(executors.run(MODEL, release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert await executors.run(RULES, len, "fast") == 4
+        snapshot = executors.snapshot()
+        release.set()
+        await asyncio.gather(*slow)
+        return snapshot
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot[MODEL]["busy"] == 1 and snapshot[MODEL]["waiting"] == 2
+    assert snapshot[RULES]["completed"] == 1
+    assert executors.snapshot()[MODEL]["completed"] == 3
+
+    client = setup_test_app()
+    metrics = client.get("/health/metrics").json()
+    assert set(metrics["executors"]) == {"rules", "model", "database"}
+
+
+def test_check_responses_carry_server_timing_and_slow_log(tmp_path):
+    client = setup_test_app()
+    original = main.slow_log
+    main.slow_log = SlowRequestLog(
+        path=str(tmp_path / "slow.log"), threshold_ms=0.001, max_bytes=4096, per_process=True
+    )
+    try:
+        resp = client.post("/check/text?fuzzy=1", json={"text": "I will kill you"})
+        assert resp.status_code == 200
+        stages = {part.split(";")[0] for part in resp.headers["Server-Timing"].split(", ")}
+        assert {"rules_queue", "normalize", "match", "fuzzy", "total"} <= stages
+        assert "server-timing" not in client.get("/health/status").headers
+
+        main.slow_log.flush()
+        assert main.slow_log.file_path == str(tmp_path / f"slow.log.{os.getpid()}")
+        entry = json.loads(Path(main.slow_log.file_path).read_text(encoding="utf-8").splitlines()[-1])
+        assert entry["path"] == "/check/text" and entry["matched_term_count"] == 1
+        assert entry["text_length"] == len("I will kill you") and len(entry["text_sha256"]) == 64
+        assert "kill" not in json.dumps(entry)
+        assert set(entry["stages_ms"]) >= {"normalize", "match"}
+
+        # Entries written or dropped change the ``slow_log`` block, so they must change the ETag too.
+        etag = client.get("/health/metrics").headers["etag"]
+        assert main.slow_log.maybe_log("POST", "/check/text", 200, RequestTimings(), 1.0)
+        main.slow_log.flush()
+        assert client.get("/health/metrics", headers={"If-None-Match": etag}).status_code == 200
+    finally:
+        main.slow_log = original
+
+
+def test_health_state_is_shared_and_probed_by_one_leader(tmp_path):
+    db_path = str(tmp_path / "health.db")
+    worker_a = HealthState(db_path=db_path, group="run-1")
+    worker_b = HealthState(db_path=db_path, group="run-1")
+    leader_a, leader_b = ProbeLeader(str(tmp_path / "probe.lock")), ProbeLeader(str(tmp_path / "probe.lock"))
+
+    assert leader_a.try_acquire() and not leader_b.try_acquire()
+    worker_a.claim_leadership()
+    worker_a.record_probe(success=False, response_ms=3.0, error="boom")
+    worker_a.record_probe(success=True, response_ms=1.0)
+
+    view_a, view_b = worker_a.snapshot(), worker_b.snapshot()
+    for key in ("total_probes", "failed_probes", "availability_percent", "last_probe_error", "started_at"):
+        assert view_a[key] == view_b[key]
+    assert view_b["total_probes"] == 2 and view_b["availability_percent"] == 50.0
+
+    # The leader exits: another worker of the same run takes over and keeps the counters.
+    leader_a.release()
+    assert leader_b.try_acquire()
+    worker_b.claim_leadership()
+    assert worker_b.snapshot()["total_probes"] == 2
+
+    # A leader from a new run starts from zero.
+    HealthState(db_path=db_path, group="run-2").claim_leadership()
+    assert worker_a.snapshot()["total_probes"] == 0
+    leader_b.release()
+
+
+def test_session_store_expires_caps_and_revokes():
+    now = [1000.0]
+    store = SessionStore(ttl_seconds=60, max_sessions=3, clock=lambda: now[0])
+    first = store.create()
+    now[0] += 10
+    second, third = store.create(), store.create()
+    assert all(store.validate(t) for t in (first, second, third))
+
+    fourth = store.create()
+    assert not store.validate(first) and store.validate(fourth)
+    assert store.snapshot()["evicted"] == 1
+
+    assert store.revoke(second) and not store.validate(second)
+    now[0] += 61
+    assert store.sweep() == 2
+    assert len(store) == 0 and store.snapshot()["expired"] == 2
+
+
+def test_shared_session_store_is_seen_by_every_worker(tmp_path):
+    now = [1000.0]
+    worker_a = SharedSessionStore(str(tmp_path / "s.db"), ttl_seconds=60, max_sessions=2, clock=lambda: now[0])
+    worker_b = SharedSessionStore(str(tmp_path / "s.db"), ttl_seconds=60, max_sessions=2, clock=lambda: now[0])
+
+    first = worker_a.create()
+    assert worker_b.validate(first)
+    now[0] += 1
+    second, third = worker_b.create(), worker_b.create()
+    assert not worker_a.validate(first) and worker_a.validate(second) and worker_a.validate(third)
+
+    assert worker_a.revoke(second) and not worker_b.validate(second)
+    now[0] += 61
+    assert worker_b.sweep() == 1
+    assert worker_a.snapshot() == worker_b.snapshot()
+    assert worker_a.snapshot()["evicted"] == 1 and worker_a.snapshot()["active"] == 0
+
+
+def test_admin_logout_removes_session_server_side():
+    client = setup_test_app()
+    main.ADMIN_PASSWORD = "test-admin-pass"
+    client.post("/admin-verify", data={"password": "test-admin-pass"}, follow_redirects=False)
+    token = client.cookies["admin_session"]
+    assert main.get_admin_sessions().validate(token)
+    active = client.get("/health/metrics").json()["admin_sessions"]["active"]
+
+    client.post("/admin/logout", follow_redirects=False)
+    assert not main.get_admin_sessions().validate(token)
+    assert client.get("/health/metrics").json()["admin_sessions"]["active"] == active - 1
+
+
+def test_text_check_reports_match_spans_on_request():
+    client = setup_test_app()
+    text = "İİ I will KILL you, k1ll3r"
+    plain = client.post("/check/text", json={"text": text}).json()
+    assert "matches" not in plain
+
+    data = client.post("/check/text?spans=true", json={"text": text}).json()
+    assert data["matched_terms"] == plain["matched_terms"]
+    spans = {m["term"]: m for m in data["matches"]}
+    assert text[spans["kill"]["start"] : spans["kill"]["end"]] == "KILL"
+    assert spans["kill"]["match_type"] == "direct"
+    assert text[spans["k1ll3r"]["start"] : spans["k1ll3r"]["end"]] == "k1ll3r"
+    assert spans["k1ll3r"]["match_type"] == "deobfuscated"
+    assert spans["k1ll3r"]["category"] == "violence"
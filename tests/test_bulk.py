@@ -0,0 +1,59 @@
+import json
+
+from app import bulk
+
+
+def test_chunk_ranges_keep_quoted_csv_records_together(tmp_path):
+    source = tmp_path / "export.csv"
+    source.write_bytes(b'id,text\n1,"multi\nline\nkill"\n2,hello\n3,"quote ""bomb"""\n')
+    _, data_start = bulk._csv_header(source)
+
+    ranges = list(bulk._chunk_ranges(source, data_start, chunk_bytes=4, quoted=True))
+    assert ranges[0] == (data_start, data_start + len(b'1,"multi\nline\nkill"\n'))
+    assert ranges[-1][1] == source.stat().st_size
+
+
+def test_bulk_run_writes_results_stats_and_resumes(tmp_path, capsys):
+    source = tmp_path / "export.jsonl"
+    rows = [{"id": 1, "text": "hello team"}, {"id": 2, "text": "I will kill you"}, {"id": 3}]
+    source.write_text("\n".join(json.dumps(r) for r in rows) + "\nnot json\n", encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+    argv = [str(source), "--output", str(output), "--id-field", "id", "--workers", "1", "--chunk-bytes", "16", "--quiet"]
+
+    assert bulk.main(argv) == 0
+    results = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [r.get("id") for r in results] == [1, 2, 3, None]
+    assert results[1]["category"] == "violence"
+    stats = json.loads((tmp_path / "out.jsonl.stats.json").read_text(encoding="utf-8"))
+    assert stats["records"] == 2
+    assert stats["errors"] == 2
+    assert stats["categories"] == {"clean": 1, "violence": 1}
+
+    checkpoint_path = tmp_path / "out.jsonl.ckpt.json"
+    checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+    first_line = len(output.read_text(encoding="utf-8").splitlines()[0].encode("utf-8")) + 1
+    checkpoint["inputs"][str(source)].update(offset=len(json.dumps(rows[0]).encode("utf-8")) + 1, done=False)
+    checkpoint["output_bytes"] = first_line
+    checkpoint["stats"] = {"records": 1, "unsafe": 0, "errors": 0, "bytes": 0, "categories": {"clean": 1}}
+    checkpoint_path.write_text(json.dumps(checkpoint), encoding="utf-8")
+    with open(output, "ab") as fh:
+        fh.write(b'{"partial": ')
+
+    assert bulk.main(argv + ["--resume"]) == 0
+    resumed = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert resumed == results
+    assert json.loads((tmp_path / "out.jsonl.stats.json").read_text(encoding="utf-8"))["records"] == 2
+
+
+def test_bulk_csv_results_point_at_their_records(tmp_path):
+    source = tmp_path / "export.csv"
+    data = b'id,text\n1,hello\n2,"multi\nline kill"\n3,bye\n'
+    source.write_bytes(data)
+    output = tmp_path / "out.jsonl"
+    argv = [str(source), "--output", str(output), "--id-field", "id", "--workers", "1", "--quiet"]
+
+    assert bulk.main(argv) == 0
+    results = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [r["id"] for r in results] == ["1", "2", "3"]
+    assert [r["offset"] for r in results] == [data.index(b"1,"), data.index(b"2,"), data.index(b"3,")]
+    assert results[1]["category"] == "violence"
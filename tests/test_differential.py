@@ -0,0 +1,23 @@
+from app.differential import compare, generate_corpus
+
+EDGE_CASES = [
+    "kill_you and killer",
+    "you k1ll3r, K.I.L.L",
+    "free---money__now",
+    "school\n\tshooting",
+    "meth and gun down",
+    "kill's kill2 killé",
+]
+
+
+def test_corpus_generator_is_deterministic_and_adversarial():
+    corpus = generate_corpus(50, seed=3)
+    assert corpus == generate_corpus(50, seed=3)
+    assert any("_" in text or "-" in text for text in corpus)
+    assert any(any(char.isdigit() or char in "@$!" for char in text) for text in corpus)
+
+
+def test_moderate_text_matches_reference_oracle():
+    mismatches, optimized, reference = compare(EDGE_CASES + generate_corpus(20, seed=11))
+    assert mismatches == []
+    assert reference > optimized
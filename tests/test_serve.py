@@ -0,0 +1,118 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork") or not Path(f"/proc/{os.getpid()}/task/{os.getpid()}/children").exists(),
+    reason="needs fork and /proc child listings",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> set[int]:
+    text = Path(f"/proc/{pid}/task/{pid}/children").read_text()
+    return {int(p) for p in text.split()}
+
+
+def _wait_for(predicate, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.1)
+    raise AssertionError("timed out")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        status = Path(f"/proc/{pid}/stat").read_text().split(")")[-1].split()[0]
+    except FileNotFoundError:
+        return False
+    return status != "Z"
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _login(port: int) -> str:
+    opener = urllib.request.build_opener(_NoRedirect)
+    data = urllib.parse.urlencode({"password": "serve-pass"}).encode()
+    try:
+        opener.open(f"http://127.0.0.1:{port}/admin-verify", data=data, timeout=10)
+    except urllib.error.HTTPError as exc:
+        cookie = exc.headers["set-cookie"]
+    return cookie.split(";")[0].split("=", 1)[1]
+
+
+def _admin_status(port: int, token: str) -> int:
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/admin/api/errors", headers={"Cookie": f"admin_session={token}"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as resp:
+            return resp.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+def test_terminating_one_worker_leaves_its_siblings_running(tmp_path):
+    port = _free_port()
+    env = dict(
+        os.environ, ADMIN_DB_PATH=str(tmp_path / "admin.db"), ADMIN_PASSWORD="serve-pass", SLOW_LOG_THRESHOLD_MS="0"
+    )
+    supervisor = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--port", str(port), "--workers", "3", "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    try:
+        workers = _wait_for(lambda: len(_children(supervisor.pid)) == 3 and _children(supervisor.pid))
+        _wait_for(lambda: socket.create_connection(("127.0.0.1", port), timeout=1).close() or True)
+        time.sleep(1.0)
+
+        # Each request opens a new connection, so the login and the checks land on different workers.
+        token = _login(port)
+        for _ in range(12):
+            assert _admin_status(port, token) == 200
+
+        victim = max(workers)
+        os.kill(victim, signal.SIGTERM)
+        _wait_for(lambda: not _alive(victim))
+        time.sleep(1.0)
+
+        assert all(_alive(pid) for pid in workers - {victim})
+        assert supervisor.poll() is None
+
+        # A shutdown that arrives while a dead worker is about to be re-forked must not fork it.
+        os.kill(min(workers), signal.SIGKILL)
+        time.sleep(0.3)
+    finally:
+        supervisor.send_signal(signal.SIGTERM)
+        try:
+            code = supervisor.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(supervisor.pid, signal.SIGKILL)
+            raise
+    assert code == 0